@@ -0,0 +1,199 @@
+"""Offline benchmark for bot.py: no bot token, no network and no MongoDB server required.
+
+Loads synthetic catalogues into the in-process stand-ins from fakes.py, then drives the
+real handlers with fake pyrogram updates:
+
+    reliable_search_handler  (hits and misses that fall through to suggestions)
+    find_suggestions
+    callback_handler         (nav page flips and showqual)
+    flexible_save_movie_quality (live indexing through the batched writer)
+
+and reports p50/p99 latency, throughput and peak memory for every scenario as JSON.
+
+    python benchmarks/bench_bot.py --sizes 1000,10000,100000 --output bench_output.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import platform
+import argparse
+import resource
+import statistics
+import subprocess
+import tracemalloc
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# bot.py validates its configuration at import time; give it harmless offline values.
+for key, value in {"API_ID": "1", "API_HASH": "offline", "BOT_TOKEN": "1:offline", "MONGO_URL": "mongodb://127.0.0.1:1",
+                   "AD_PAGE_URL": "https://example.invalid", "ADMIN_IDS": "1", "LOG_CHANNEL_ID": "-1001"}.items():
+    os.environ.setdefault(key, value)
+
+import bot  # noqa: E402
+from fakes import FakeDatabase, FakeClient, FakeMessage, FakeCallbackQuery, fake_file  # noqa: E402
+from pyrogram.enums import ChatType  # noqa: E402
+
+SYLLABLES = ["ka", "ra", "mo", "shi", "ta", "na", "lo", "vi", "de", "su", "ban", "dor", "kel", "mir", "zan", "tor", "el", "an", "is", "ru"]
+QUALITIES, LANGUAGES = ["480p", "720p", "1080p", "2160p"], ["hindi", "bangla", "english", "tamil", "telugu"]
+
+
+# ========= 🧪 সিনথেটিক ডেটা ========= #
+def make_vocabulary(rng, size=3000):
+    words = set()
+    while len(words) < size: words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+def make_titles(rng, vocabulary, count):
+    titles, seen = [], set()
+    while len(titles) < count:
+        title = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))).title()
+        if rng.random() < 0.2: title += f" {rng.randint(2, 5)}"
+        if title not in seen: seen.add(title); titles.append(title)
+    return titles
+
+def misspell(rng, text):
+    chars = list(text.lower())
+    for _ in range(max(1, len(chars) // 6)):
+        position = rng.randrange(len(chars))
+        if chars[position] != " ": chars[position] = rng.choice("aeioukrt")
+    return "".join(chars)
+
+async def load_catalogue(rng, titles):
+    movies = [{"title": title, "year": str(rng.randint(1960, 2025)), "title_lower": title.lower(), "title_tokens": bot.tokenize(title)} for title in titles]
+    await bot.movie_info_db.insert_many(movies)
+    files = [{"movie_id": movie["_id"], "quality": quality, "language": "Hindi", "file_id": f"file-{i}-{quality}", "chat_id": bot.FILE_CHANNEL_ID, "msg_id": i * 4 + q}
+             for i, movie in enumerate(movies) for q, quality in enumerate(rng.sample(QUALITIES, rng.randint(1, 3)))]
+    await bot.files_db.insert_many(files)
+    return movies
+
+
+# ========= ⚙️ বট প্রস্তুতি ========= #
+def reset_bot(database, client):
+    """Point bot.py at a fresh fake database and reset every piece of in-process state."""
+    bot.app, bot.db = client, database
+    bot.movie_info_db, bot.files_db, bot.users_db = database["movie_info"], database["files"], database["users"]
+    bot.pending_deletes_db, bot.state_db = database["pending_deletes"], database["bot_state"]
+    for cache in [*bot.CACHES, bot.search_sessions]: cache.data.clear(); cache.hits = cache.misses = 0
+    bot.suggestion_index, bot.search_flight = bot.SuggestionIndex(), bot.SingleFlight()
+    bot.index_writer, bot.delete_scheduler = bot.IndexWriter(), bot.DeleteScheduler()
+    # Telegram's pacing would dominate every number; the benchmark measures the bot itself.
+    bot.user_search_limiter, bot.chat_search_limiter = bot.TokenBucket(1e9, 1e9), bot.TokenBucket(1e9, 1e9)
+    bot.send_queue = bot.SendQueue(1e9, 1e9, 1e9, 256)
+    bot.send_queue.start()
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+async def measure(name, size, operation, iterations, trace_memory, settle=None):
+    latencies = []
+    if trace_memory: tracemalloc.start()
+    started = time.perf_counter()
+    for i in range(iterations):
+        op_started = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - op_started)
+    if settle: await settle()
+    elapsed = time.perf_counter() - started
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    if trace_memory: tracemalloc.stop()
+    latencies.sort()
+    result = {"size": size, "scenario": name, "iterations": iterations,
+              "p50_ms": round(statistics.median(latencies) * 1000, 4),
+              "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 4),
+              "mean_ms": round(statistics.fmean(latencies) * 1000, 4),
+              "ops_per_sec": round(iterations / elapsed, 1), "peak_rss_mb": peak_rss_mb()}
+    if traced_peak is not None: result["traced_peak_mb"] = round(traced_peak / (1024 * 1024), 2)
+    print(f"  {name:<18} p50 {result['p50_ms']:>9.3f} ms   p99 {result['p99_ms']:>9.3f} ms   {result['ops_per_sec']:>10.1f} ops/s", file=sys.stderr)
+    return result
+
+
+# ========= 🏁 সিনারিও ========= #
+async def run_size(size, iterations, seed, trace_memory):
+    rng = random.Random(seed)
+    client = FakeClient()
+    reset_bot(FakeDatabase(), client)
+    results = []
+
+    load_started = time.perf_counter()
+    titles = make_titles(rng, make_vocabulary(rng), size)
+    await bot.ensure_indexes()
+    movies = await load_catalogue(rng, titles)
+    await bot.ensure_title_tokens()
+    load_seconds = time.perf_counter() - load_started
+    build_started = time.perf_counter()
+    await bot.suggestion_index.build()
+    build_seconds = time.perf_counter() - build_started
+    print(f"size {size}: catalogue loaded in {load_seconds:.2f}s, suggestion index built in {build_seconds:.2f}s", file=sys.stderr)
+    results.append({"size": size, "scenario": "suggestion_index_build", "iterations": 1, "seconds": round(build_seconds, 4), "peak_rss_mb": peak_rss_mb()})
+
+    def private_message(i, text):
+        return FakeMessage(10_000 + i, ChatType.PRIVATE, user_id=10_000 + i, text=text, client=client)
+
+    hit_queries = [" ".join(bot.tokenize(title)[:2]) for title in rng.sample(titles, min(len(titles), iterations))]
+    miss_queries = [misspell(rng, title) for title in rng.sample(titles, min(len(titles), iterations))]
+
+    async def search_hit(i): await bot.reliable_search_handler(client, private_message(i, hit_queries[i % len(hit_queries)]))
+    async def search_miss(i): await bot.reliable_search_handler(client, private_message(i, miss_queries[i % len(miss_queries)]))
+    async def suggestions(i): await bot.find_suggestions(miss_queries[i % len(miss_queries)])
+    results.append(await measure("search_hit", size, search_hit, iterations, trace_memory))
+    results.append(await measure("search_miss", size, search_miss, iterations, trace_memory))
+    results.append(await measure("find_suggestions", size, suggestions, iterations, trace_memory))
+
+    broad_prefix = Counter(token[:2] for title in titles for token in bot.tokenize(title)).most_common(1)[0][0]
+    _, ids = await bot.search_movies(broad_prefix)
+    session = bot.create_search_session(broad_prefix, ids)
+    pages = max(1, -(-len(ids) // bot.SEARCH_PAGE_SIZE))
+    results_msg = FakeMessage(1, ChatType.PRIVATE, client=client)
+    async def nav(i): await bot.callback_handler(client, FakeCallbackQuery(f"nav_{session['token']}_{rng.randrange(pages)}", results_msg, 7))
+    async def showqual(i): await bot.callback_handler(client, FakeCallbackQuery(f"showqual_{rng.choice(movies)['_id']}", FakeMessage(1, client=client), 7))
+    results.append(await measure("nav", size, nav, iterations, trace_memory))
+    results.append(await measure("showqual", size, showqual, iterations, trace_memory))
+
+    new_titles = make_titles(rng, make_vocabulary(random.Random(seed + 1)), iterations)
+    async def index_post(i):
+        caption = f"{new_titles[i]} ({rng.randint(1960, 2025)}) {rng.choice(QUALITIES)} {rng.choice(LANGUAGES)}"
+        await bot.flexible_save_movie_quality(client, FakeMessage(bot.FILE_CHANNEL_ID, ChatType.CHANNEL, caption=caption, video=fake_file(f"new-{i}"), client=client))
+    results.append(await measure("indexer", size, index_post, iterations, trace_memory, settle=bot.index_writer.flush))
+
+    for result in results[1:]:
+        result["cache_hit_ratio"] = {cache.name: round(cache.hits / max(cache.hits + cache.misses, 1), 3) for cache in bot.CACHES}
+    await bot.send_queue.stop()
+    return results
+
+
+def git_revision():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception: return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark for the movie bot handlers.")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma separated catalogue sizes (e.g. 1000,10000,100000,1000000)")
+    parser.add_argument("--iterations", type=int, default=300, help="operations per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--trace-memory", action="store_true", help="also record per-scenario tracemalloc peaks (slower)")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    logging.getLogger("bot").setLevel(logging.WARNING)
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(",") if size.strip()):
+        results += asyncio.run(run_size(size, args.iterations, args.seed, args.trace_memory))
+    report = {"meta": {"revision": git_revision(), "python": platform.python_version(), "platform": platform.platform(),
+                       "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "iterations": args.iterations, "seed": args.seed},
+              "results": results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as handle: handle.write(output + "\n")
+    else: print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Accuracy and throughput benchmark for caption_parser.py against a labeled caption corpus.
+
+Every record in caption_corpus.jsonl carries the caption (and optionally the file name)
+plus the expected title, year, quality, languages, season, episode and codec. The report
+gives per-field accuracy, the captions that failed, and captions/sec for parse_caption()
+and the batched parse_captions(), next to the regex chain bot.py used before.
+
+    python benchmarks/bench_parser.py --repeat 2000 --output parser_output.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from caption_parser import parse_caption, parse_captions  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "caption_corpus.jsonl")
+FIELDS = ["title", "year", "quality", "languages", "season", "episode", "codec"]
+
+
+# ========= 🕰️ পুরনো পার্সার (তুলনার জন্য) ========= #
+def legacy_parse(caption, file_name=None):
+    """The parse_file_message() logic bot.py shipped before caption_parser.py, minus the Telegram objects."""
+    caption = caption or ""
+    title_match = re.search(r"(.+?)\s*\(?(\d{4})\)?", caption, re.IGNORECASE)
+    year = title_match.group(2) if title_match else None
+    raw_title = title_match.group(1).strip() if title_match else ' '.join(caption.split()[:5])
+    if not raw_title: raw_title = file_name or ""
+    quality = next((q for q in ["480p", "720p", "1080p", "2160p", "4k"] if q in caption.lower()), None)
+    language = next((lang.capitalize() for lang in ["hindi", "bangla", "bengali", "english", "tamil", "telugu"] if lang in caption.lower()), None)
+    return {"title": re.sub(r'[\.\_]', ' ', raw_title).strip() or None, "year": year, "quality": quality,
+            "languages": ["Bangla" if language == "Bengali" else language] if language else [], "season": None, "episode": None, "codec": None}
+
+
+# ========= 📏 মাপজোখ ========= #
+def load_corpus(path):
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+def accuracy(parser, corpus):
+    correct, failures = dict.fromkeys(FIELDS, 0), []
+    for record in corpus:
+        parsed, expected = parser(record['caption'], record.get('file_name')), record['expected']
+        wrong = {field: {"expected": expected[field], "got": parsed[field]} for field in FIELDS if parsed[field] != expected[field]}
+        for field in FIELDS: correct[field] += field not in wrong
+        if wrong: failures.append({"caption": record['caption'] or record.get('file_name'), "fields": wrong})
+    fields = {field: round(correct[field] / len(corpus), 4) for field in FIELDS}
+    return {"fields": fields, "exact_match": round(1 - len(failures) / len(corpus), 4), "failures": failures}
+
+def throughput(func, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter(); count = func(); timings.append(count / (time.perf_counter() - started))
+    return {"captions_per_sec": round(statistics.median(timings)), "best_captions_per_sec": round(max(timings))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and throughput benchmark for the caption parser.")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeat", type=int, default=1000, help="how many times the corpus is replayed per throughput round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--show-failures", action="store_true", help="include every mis-parsed caption in the report")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    items = [(record['caption'], record.get('file_name')) for record in corpus] * args.repeat
+    report = {"meta": {"python": platform.python_version(), "platform": platform.platform(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                       "corpus_size": len(corpus), "captions_per_round": len(items), "rounds": args.rounds}, "results": {}}
+    for name, parse, batch in [("caption_parser", parse_caption, parse_captions), ("legacy", legacy_parse, None)]:
+        result = accuracy(parse, corpus)
+        if not args.show_failures: result['failures'] = len(result['failures'])
+        result['single'] = throughput(lambda: len([parse(caption, file_name) for caption, file_name in items]), args.rounds)
+        if batch: result['batch'] = throughput(lambda: len(batch(items)), args.rounds)
+        report['results'][name] = result
+        print(f"  {name:<15} exact {result['exact_match']:>6.1%}   {result['single']['captions_per_sec']:>9} captions/s", file=sys.stderr)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle: handle.write(output + "\n")
+    else: print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""In-process stand-ins for MongoDB (motor) and Telegram (pyrogram) used by the offline benchmarks.
+
+Only the subset of the motor / pyrogram API that bot.py actually calls is implemented.
+Collections keep simple secondary indexes for fields passed to create_index(), so that
+anchored prefix regexes and equality lookups do not degrade into full scans the way a
+naive fake would; that keeps the numbers about the bot, not about the fake.
+"""
+
+import re
+import bisect
+import itertools
+from types import SimpleNamespace
+
+from bson.objectid import ObjectId
+from pyrogram.enums import ChatType
+
+_MISSING = object()
+
+
+# ========= 🗄️ MongoDB stand-in ========= #
+def _get(doc, field):
+    value = doc
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value: return _MISSING
+        value = value[part]
+    return value
+
+def _sort_key(value):
+    if value is _MISSING or value is None: return (0, 0)
+    if isinstance(value, (int, float)): return (1, value)
+    if isinstance(value, str): return (2, value)
+    if isinstance(value, ObjectId): return (3, value.binary)
+    return (4, str(value))
+
+def _values(value):
+    return value if isinstance(value, list) else [value]
+
+def _match_value(value, condition):
+    if isinstance(condition, re.Pattern):
+        return any(isinstance(v, str) and condition.search(v) for v in _values(value))
+    if isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition):
+        for op, arg in condition.items():
+            if op == "$exists":
+                if (value is not _MISSING) != bool(arg): return False
+            elif op == "$in":
+                if not any(v in arg for v in _values(None if value is _MISSING else value)): return False
+            elif op == "$nin":
+                if any(v in arg for v in _values(None if value is _MISSING else value)): return False
+            elif op == "$ne":
+                if value == arg: return False
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is _MISSING or value is None: return False
+                left, right = _sort_key(value), _sort_key(arg)
+                if not {"$gt": left > right, "$gte": left >= right, "$lt": left < right, "$lte": left <= right}[op]: return False
+            elif op == "$regex":
+                if not _match_value(value, re.compile(arg, re.IGNORECASE if "i" in condition.get("$options", "") else 0)): return False
+            elif op == "$options": continue
+            else: raise NotImplementedError(f"Operator {op} is not supported by the fake")
+        return True
+    if condition is None: return value is _MISSING or value is None
+    if value is _MISSING: return False
+    return value == condition or (isinstance(value, list) and condition in value)
+
+def match(doc, query):
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(match(doc, sub) for sub in condition): return False
+        elif key == "$or":
+            if not any(match(doc, sub) for sub in condition): return False
+        elif not _match_value(_get(doc, key), condition): return False
+    return True
+
+def project(doc, projection):
+    if not projection: return dict(doc)
+    include = {key for key, flag in projection.items() if flag and key != "_id"}
+    if include:
+        result = {key: doc[key] for key in include if key in doc}
+        if projection.get("_id", 1) and "_id" in doc: result["_id"] = doc["_id"]
+        return result
+    return {key: value for key, value in doc.items() if projection.get(key, 1)}
+
+def sort_docs(docs, spec):
+    for field, direction in reversed(list(spec.items()) if isinstance(spec, dict) else spec):
+        docs.sort(key=lambda doc: _sort_key(_get(doc, field)), reverse=direction < 0)
+    return docs
+
+
+class FakeCursor:
+    def __init__(self, loader):
+        self._loader, self._sort, self._skip, self._limit = loader, None, 0, 0
+
+    def sort(self, key, direction=1):
+        self._sort = [(key, direction)] if isinstance(key, str) else list(key)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def batch_size(self, _):
+        return self
+
+    def _docs(self):
+        docs = self._loader()
+        if self._sort: docs = sort_docs(docs, self._sort)
+        docs = docs[self._skip:]
+        return docs[:self._limit] if self._limit else docs
+
+    async def to_list(self, length=None):
+        docs = self._docs()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._docs(): yield doc
+
+
+class FakeCollection:
+    def __init__(self, database, name):
+        self.database, self.name = database, name
+        self.docs, self.indexes = {}, {}
+
+    # --- internal index maintenance ---
+    def _index(self, doc, add):
+        for field, index in self.indexes.items():
+            value = _get(doc, field)
+            for key in _values(None if value is _MISSING else value):
+                try: hash(key)
+                except TypeError: continue
+                bucket = index["map"].get(key)
+                if add:
+                    if bucket is None:
+                        bucket = index["map"][key] = set()
+                        index["sorted"] = None
+                    bucket.add(doc["_id"])
+                elif bucket is not None:
+                    bucket.discard(doc["_id"])
+                    if not bucket: del index["map"][key]; index["sorted"] = None
+
+    def _store(self, doc):
+        self.docs[doc["_id"]] = doc
+        self._index(doc, True)
+
+    def _drop(self, doc):
+        self._index(doc, False)
+        del self.docs[doc["_id"]]
+
+    def _candidate_ids(self, query):
+        """Return a set of ids that may match, or None when only a full scan will do."""
+        if "_id" in query:
+            condition = query["_id"]
+            if isinstance(condition, dict) and "$in" in condition: return set(condition["$in"])
+            if not isinstance(condition, dict): return {condition}
+        for clause in query.get("$and", []):
+            ids = self._candidate_ids(clause)
+            if ids is not None: return ids
+        if "$or" in query:
+            branches = [self._candidate_ids(clause) for clause in query["$or"]]
+            if branches and all(ids is not None for ids in branches): return set().union(*branches)
+        for field, condition in query.items():
+            index = self.indexes.get(field)
+            if index is None: continue
+            if isinstance(condition, re.Pattern) and condition.pattern.startswith("^") and not condition.flags & re.IGNORECASE:
+                prefix = condition.pattern[1:]
+                if re.escape(re.sub(r"\\(.)", r"\1", prefix)) != prefix: continue
+                prefix = re.sub(r"\\(.)", r"\1", prefix)
+                if index["sorted"] is None: index["sorted"] = sorted(key for key in index["map"] if isinstance(key, str))
+                keys, ids = index["sorted"], set()
+                for position in range(bisect.bisect_left(keys, prefix), len(keys)):
+                    if not keys[position].startswith(prefix): break
+                    ids |= index["map"][keys[position]]
+                return ids
+            if not isinstance(condition, (dict, re.Pattern, list)):
+                return set(index["map"].get(condition, ()))
+        return None
+
+    def _find(self, query):
+        query = query or {}
+        ids = self._candidate_ids(query)
+        docs = self.docs.values() if ids is None else (self.docs[i] for i in ids if i in self.docs)
+        return [doc for doc in docs if match(doc, query)]
+
+    # --- motor API ---
+    async def create_index(self, keys, unique=False, name=None, **_):
+        fields = [keys] if isinstance(keys, str) else [field for field, _ in keys]
+        if fields[0] not in self.indexes:
+            self.indexes[fields[0]] = {"map": {}, "sorted": None}
+            for doc in self.docs.values(): self._index(doc, True)
+        return name or "_".join(f"{field}_1" for field in fields)
+
+    async def create_indexes(self, models):
+        return [await self.create_index(model.document["key"].items() if hasattr(model, "document") else model) for model in models]
+
+    async def index_information(self):
+        return {"_id_": {"key": [("_id", 1)]}, **{f"{field}_1": {"key": [(field, 1)]} for field in self.indexes}}
+
+    async def drop_index(self, name):
+        self.indexes.pop(name.rsplit("_", 1)[0], None)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor(lambda: [project(doc, projection) for doc in self._find(query)])
+
+    async def find_one(self, query=None, projection=None):
+        docs = self._find(query)
+        return project(docs[0], projection) if docs else None
+
+    async def count_documents(self, query):
+        return len(self._find(query)) if query else len(self.docs)
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self._store(dict(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self._store(dict(doc))
+        return SimpleNamespace(inserted_ids=[doc["_id"] for doc in docs])
+
+    def _apply(self, doc, update, inserting):
+        for op, fields in update.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting): doc.update(fields)
+            elif op == "$inc":
+                for key, amount in fields.items(): doc[key] = doc.get(key, 0) + amount
+            elif op != "$setOnInsert": raise NotImplementedError(f"Update operator {op} is not supported by the fake")
+
+    def _update(self, query, update, upsert):
+        docs = self._find(query)
+        if docs:
+            doc = docs[0]
+            before = dict(doc)
+            self._drop(doc)
+            self._apply(doc, update, False)
+            self._store(doc)
+            return SimpleNamespace(matched_count=1, modified_count=int(before != doc), upserted_id=None), doc
+        if not upsert: return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None), None
+        doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, (dict, re.Pattern))}
+        self._apply(doc, update, True)
+        doc.setdefault("_id", ObjectId())
+        self._store(doc)
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=doc["_id"]), doc
+
+    async def update_one(self, query, update, upsert=False):
+        return self._update(query, update, upsert)[0]
+
+    async def replace_one(self, query, replacement, upsert=False):
+        docs = self._find(query)
+        if docs: self._drop(docs[0])
+        elif not upsert: return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+        doc = {"_id": docs[0]["_id"] if docs else query.get("_id", ObjectId()), **replacement}
+        self._store(doc)
+        return SimpleNamespace(matched_count=len(docs), modified_count=len(docs), upserted_id=None if docs else doc["_id"])
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=False, projection=None):
+        before = await self.find_one(query)
+        _, doc = self._update(query, update, upsert)
+        return project(doc, projection) if return_document and doc else before
+
+    async def find_one_and_delete(self, query):
+        docs = self._find(query)
+        if not docs: return None
+        self._drop(docs[0])
+        return docs[0]
+
+    async def delete_many(self, query):
+        docs = self._find(query)
+        for doc in docs: self._drop(doc)
+        return SimpleNamespace(deleted_count=len(docs))
+
+    async def bulk_write(self, operations, ordered=True):
+        upserted = modified = matched = 0
+        for operation in operations:
+            result, _ = self._update(operation._filter, operation._doc, operation._upsert)
+            upserted += result.upserted_id is not None
+            modified += result.modified_count
+            matched += result.matched_count
+        return SimpleNamespace(upserted_count=upserted, modified_count=modified, matched_count=matched)
+
+    def aggregate(self, pipeline):
+        return FakeCursor(lambda: self._run_pipeline(None, pipeline))
+
+    def _run_pipeline(self, docs, pipeline):
+        for stage in pipeline:
+            (op, arg), = stage.items()
+            if op == "$match": docs = self._find(arg) if docs is None else [doc for doc in docs if match(doc, arg)]
+            else:
+                docs = list(self.docs.values()) if docs is None else docs
+                if op == "$sort": docs = sort_docs(list(docs), arg)
+                elif op == "$skip": docs = docs[arg:]
+                elif op == "$limit": docs = docs[:arg]
+                elif op == "$project": docs = [project(doc, arg) for doc in docs]
+                elif op == "$count": docs = [{arg: len(docs)}] if docs else []
+                elif op == "$facet": docs = [{name: self._run_pipeline(list(docs), sub) for name, sub in arg.items()}]
+                elif op == "$lookup":
+                    foreign = self.database[arg["from"]]
+                    docs = [{**doc, arg["as"]: [dict(other) for other in foreign._find({arg["foreignField"]: doc.get(arg["localField"])})]} for doc in docs]
+                else: raise NotImplementedError(f"Pipeline stage {op} is not supported by the fake")
+        return [dict(doc) for doc in (docs if docs is not None else self.docs.values())]
+
+
+class FakeDatabase:
+    def __init__(self, name="MovieDB"):
+        self.name, self.collections = name, {}
+
+    def __getitem__(self, name):
+        if name not in self.collections: self.collections[name] = FakeCollection(self, name)
+        return self.collections[name]
+
+
+# ========= ✈️ Telegram stand-in ========= #
+_message_ids = itertools.count(1)
+
+class FakeMessage:
+    def __init__(self, chat_id, chat_type=ChatType.PRIVATE, user_id=None, text=None, caption=None, video=None, document=None, client=None):
+        self.id, self.empty = next(_message_ids), False
+        self.chat = SimpleNamespace(id=chat_id, type=chat_type)
+        self.from_user = SimpleNamespace(id=user_id, is_bot=False, first_name=f"user{user_id}", mention=f"user{user_id}") if user_id else None
+        self.text, self.caption, self.video, self.document, self.client = text, caption, video, document, client
+        self.command = text.split()[0][1:].split("@")[0:1] + text.split()[1:] if text and text.startswith("/") else None
+        self.reply_to_message, self.reply_markup = None, None
+
+    def _sent(self, text=None, reply_markup=None):
+        if self.client: self.client.sent += 1
+        reply = FakeMessage(self.chat.id, self.chat.type, text=text, client=self.client)
+        reply.reply_markup = reply_markup
+        return reply
+
+    async def reply_text(self, text, reply_markup=None, quote=None, **_):
+        return self._sent(text, reply_markup)
+
+    async def edit_text(self, text, reply_markup=None, **_):
+        self.text, self.reply_markup = text, reply_markup
+        if self.client: self.client.sent += 1
+        return self
+
+    async def edit_reply_markup(self, reply_markup=None):
+        self.reply_markup = reply_markup
+        return self
+
+    async def copy(self, chat_id, **_):
+        return self._sent()
+
+    async def delete(self):
+        return True
+
+
+class FakeCallbackQuery:
+    def __init__(self, data, message, user_id):
+        self.data, self.message = data, message
+        self.from_user = SimpleNamespace(id=user_id, mention=f"user{user_id}", first_name=f"user{user_id}")
+
+    async def answer(self, *_, **__):
+        return True
+
+
+class FakeClient:
+    def __init__(self):
+        self.sent, self.deleted, self.channel_messages = 0, 0, {}
+
+    async def copy_message(self, chat_id, from_chat_id, message_id, caption=None, **_):
+        self.sent += 1
+        return FakeMessage(chat_id, client=self)
+
+    async def send_message(self, chat_id, text, reply_markup=None, **_):
+        self.sent += 1
+        return FakeMessage(chat_id, text=text, client=self)
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.deleted += len(message_ids)
+        return True
+
+    async def get_messages(self, chat_id, message_ids):
+        return [self.channel_messages.get(message_id) or SimpleNamespace(id=message_id, empty=True) for message_id in message_ids]
+
+
+def fake_file(file_id, file_name="movie.mkv"):
+    return SimpleNamespace(file_id=file_id, file_name=file_name)
@@ -12,20 +12,30 @@
 
 import os
 import re
+import sys
 import math
+import time
+import heapq
 import base64
+import secrets
 import logging
 import asyncio
+import itertools
+import functools
+import threading
+from contextlib import contextmanager
+from collections import Counter, OrderedDict, defaultdict
 from dotenv import load_dotenv
-from threading import Thread
-from flask import Flask
-from pyrogram import Client, filters
+from pyrogram import Client, filters, idle
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ForceReply
 from pyrogram.enums import ChatType
-from pyrogram.errors import MessageNotModified
+from pyrogram.errors import MessageNotModified, FloodWait, UserIsBlocked, InputUserDeactivated, UserDeactivated, PeerIdInvalid
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, OperationFailure
 from bson.objectid import ObjectId
 from thefuzz import process
+from caption_parser import parse_captions
 
 # --- পরিবেশ সেটআপ ও কনফিগারেশন ---
 load_dotenv()
@@ -44,7 +54,13 @@ try:
     ADMIN_IDS = [int(id.strip()) for id in os.environ.get("ADMIN_IDS", "").split(',') if id.strip()]
     LOG_CHANNEL_ID = int(os.environ.get("LOG_CHANNEL_ID"))
     PORT = int(os.environ.get("PORT", 8080))
-    DELETE_DELAY, SEARCH_PAGE_SIZE = 15 * 60, 8
+    PROFILER_ENABLED = os.environ.get("ENABLE_PROFILER", "").lower() in ("1", "true", "yes")
+    DELETE_DELAY, SEARCH_PAGE_SIZE, MAX_SEARCH_RESULTS = 15 * 60, 8, 500
+    INDEX_BATCH_SIZE, BACKFILL_CHUNK_SIZE, BACKFILL_EMPTY_LIMIT = 200, 200, 5
+    USER_SEARCH_RATE, USER_SEARCH_BURST = float(os.environ.get("USER_SEARCH_RATE", 0.5)), int(os.environ.get("USER_SEARCH_BURST", 5))
+    CHAT_SEARCH_RATE, CHAT_SEARCH_BURST = float(os.environ.get("CHAT_SEARCH_RATE", 3)), int(os.environ.get("CHAT_SEARCH_BURST", 15))
+    GLOBAL_SEND_RATE, CHAT_SEND_RATE, CHAT_SEND_BURST = float(os.environ.get("GLOBAL_SEND_RATE", 25)), float(os.environ.get("CHAT_SEND_RATE", 1)), int(os.environ.get("CHAT_SEND_BURST", 3))
+    SEND_CONCURRENCY, BROADCAST_BATCH_SIZE = 16, 50
 except (ValueError, TypeError) as e:
     LOGGER.critical(f"Configuration error in environment variables: {e}")
     exit()
@@ -53,221 +69,925 @@ if not all([API_ID, API_HASH, BOT_TOKEN, MONGO_URL, AD_PAGE_URL, ADMIN_IDS, LOG_
     LOGGER.critical("One or more environment variables are missing.")
     exit()
 
-# --- ক্লায়েন্ট, ডাটাবেস ও ওয়েব অ্যাপ ---
+# --- মেট্রিক্স রেজিস্ট্রি ---
+class Metrics:
+    """Prometheus টেক্সট ফরম্যাটের ছোট রেজিস্ট্রি: হিস্টোগ্রাম, গজ এবং স্ক্রেপের সময় পড়া কালেক্টর।"""
+    BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms, self.gauges, self.collectors, self.help = defaultdict(dict), defaultdict(dict), [], {}
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted(labels.items()))
+
+    @staticmethod
+    def _format(labels, extra=()):
+        pairs = [*labels, *extra]
+        return "{" + ",".join(f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in pairs) + "}" if pairs else ""
+
+    def observe(self, name, value, **labels):
+        with self.lock:
+            series = self.histograms[name].setdefault(self._labels(labels), [0] * (len(self.BUCKETS) + 2))
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound: series[i] += 1; break
+            else: series[len(self.BUCKETS)] += 1
+            series[-1] += value
+
+    def set_gauge(self, name, value, **labels):
+        self.gauges[name][self._labels(labels)] = value
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - started, **labels)
+
+    def collect(self, name, kind, help_text, func):
+        """func() স্ক্রেপের সময় ডাকা হয়; একটি সংখ্যা অথবা {labels: value} ডিকশনারি ফেরত দেয়।"""
+        self.collectors.append((name, kind, help_text, func))
+
+    def render(self):
+        lines = []
+        with self.lock: histograms = {name: {labels: list(series) for labels, series in data.items()} for name, data in self.histograms.items()}
+        for name, data in histograms.items():
+            lines += [f"# HELP {name} {self.help.get(name, name)}", f"# TYPE {name} histogram"]
+            for labels, series in data.items():
+                cumulative = 0
+                for bound, count in zip([*self.BUCKETS, "+Inf"], series):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._format(labels, [('le', bound)])} {cumulative}")
+                lines += [f"{name}_sum{self._format(labels)} {series[-1]}", f"{name}_count{self._format(labels)} {cumulative}"]
+        for name, data in self.gauges.items():
+            lines += [f"# HELP {name} {self.help.get(name, name)}", f"# TYPE {name} gauge"]
+            lines += [f"{name}{self._format(labels)} {value}" for labels, value in data.items()]
+        for name, kind, help_text, func in self.collectors:
+            try: values = func()
+            except Exception as e: LOGGER.debug(f"Metric collector {name} failed: {e}"); continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{self._format(labels)} {value}" for labels, value in (values.items() if isinstance(values, dict) else [((), values)])]
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+metrics.help.update({"bot_handler_seconds": "Handler latency in seconds.", "bot_mongo_command_seconds": "MongoDB command round-trip time in seconds.",
+                     "bot_event_loop_lag_seconds": "Extra delay observed by a periodic asyncio sleep."})
+
+def timed(handler):
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with metrics.timer("bot_handler_seconds", handler=handler): return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo কমান্ড ইভেন্ট থেকে প্রতি কালেকশন ও কমান্ডের রাউন্ড-ট্রিপ সময় রেকর্ড করে।"""
+    def __init__(self):
+        self.collections = {}
+
+    def started(self, event):
+        target = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        self.collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        metrics.observe("bot_mongo_command_seconds", event.duration_micros / 1e6, command=event.command_name, collection=collection)
+
+# --- ক্লায়েন্ট ও ডাটাবেস ---
 app = Client("MovieBot", api_id=API_ID, api_hash=API_HASH, bot_token=BOT_TOKEN)
-mongo_client = AsyncIOMotorClient(MONGO_URL)
+mongo_client = AsyncIOMotorClient(MONGO_URL, event_listeners=[MongoCommandTimer()])
 db = mongo_client["MovieDB"]
 movie_info_db, files_db, users_db = db["movie_info"], db["files"], db["users"]
-web_app = Flask(__name__)
-@web_app.route('/')
-def health_check(): return "Bot is alive and running!"
+pending_deletes_db, state_db = db["pending_deletes"], db["bot_state"]
 
 # ========= 📄 হেল্পার ফাংশন ========= #
 def is_admin(_, __, message):
     return message.from_user and message.from_user.id in ADMIN_IDS
 admin_filter = filters.create(is_admin)
 
-async def delete_messages_after_delay(messages_to_delete, delay):
-    await asyncio.sleep(delay)
-    for msg in messages_to_delete:
+def is_force_reply(_, __, message):
+    return bool(message.reply_to_message and isinstance(message.reply_to_message.reply_markup, ForceReply))
+force_reply_filter = filters.create(is_force_reply)
+
+# ========= ⏳ অটো-ডিলিট শিডিউলার ========= #
+class DeleteScheduler:
+    """একটি হিপ-ভিত্তিক শিডিউলার; পেন্ডিং ডিলিট MongoDB-তে থাকে তাই রিস্টার্টের পরেও মেসেজ মুছে যায়।"""
+    def __init__(self, flush_interval=1.0, idle_wait=60):
+        self.flush_interval, self.idle_wait = flush_interval, idle_wait
+        self.heap, self.unsaved, self.wakeup, self.task, self.running = [], [], asyncio.Event(), None, set()
+
+    def schedule(self, messages, delay):
+        due_at, by_chat = time.time() + delay, defaultdict(list)
+        for msg in messages:
+            if msg: by_chat[msg.chat.id].append(msg.id)
+        if not by_chat: return
+        was_idle = not self.unsaved
+        for chat_id, message_ids in by_chat.items():
+            doc = {"_id": ObjectId(), "chat_id": chat_id, "message_ids": message_ids, "due_at": due_at}
+            heapq.heappush(self.heap, (due_at, doc['_id'], doc))
+            self.unsaved.append(doc)
+        if was_idle: self.wakeup.set()
+
+    async def start(self):
+        resumed = 0
+        async for doc in pending_deletes_db.find({}):
+            heapq.heappush(self.heap, (doc['due_at'], doc['_id'], doc)); resumed += 1
+        LOGGER.info(f"⏳ Delete scheduler resumed {resumed} pending deletions.")
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task: self.task.cancel()
+        for task in self.running: task.cancel()  # সারি MongoDB-তে থেকে যায়, পরের start() আবার চালায়
+        await self._flush()
+
+    async def _flush(self):
+        if not self.unsaved: return
+        docs, self.unsaved = self.unsaved, []
+        try: await pending_deletes_db.insert_many(docs, ordered=False)
+        except Exception as e: LOGGER.error(f"Failed to persist {len(docs)} pending deletions: {e}")
+
+    async def _delete_chat(self, chat_id, docs):
+        message_ids = [message_id for doc in docs for message_id in doc['message_ids']]
+        for i in range(0, len(message_ids), 100):
+            try: await send_queue.send(chat_id, app.delete_messages, chat_id, message_ids[i:i + 100], priority=SendQueue.BULK)
+            except Exception as e: LOGGER.debug(f"Auto-delete failed in chat {chat_id}: {e}")
+        try: await pending_deletes_db.delete_many({"_id": {"$in": [doc['_id'] for doc in docs]}})
+        except Exception as e: LOGGER.error(f"Failed to clear {len(docs)} finished deletions: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await self._flush()
+                now, due = time.time(), []
+                while self.heap and self.heap[0][0] <= now: due.append(heapq.heappop(self.heap)[2])
+                if due:
+                    # পেসিং বা FloodWait-এ আটকে থাকা ডিলিট যেন নতুন শিডিউল সেভ হওয়া না আটকায়, তাই প্রতি চ্যাট আলাদা টাস্ক।
+                    by_chat = defaultdict(list)
+                    for doc in due: by_chat[doc['chat_id']].append(doc)
+                    for chat_id, docs in by_chat.items():
+                        task = asyncio.create_task(self._delete_chat(chat_id, docs))
+                        self.running.add(task); task.add_done_callback(self.running.discard)
+                timeout = self.heap[0][0] - time.time() if self.heap else self.idle_wait
+                if self.unsaved: timeout = min(timeout, self.flush_interval)
+                self.wakeup.clear()
+                try: await asyncio.wait_for(self.wakeup.wait(), max(timeout, 0))
+                except asyncio.TimeoutError: pass
+            except asyncio.CancelledError: raise
+            except Exception as e: LOGGER.error(f"Delete scheduler error: {e}"); await asyncio.sleep(self.flush_interval)
+
+delete_scheduler = DeleteScheduler()
+
+# ========= 🧠 ক্যাশ লেয়ার ========= #
+class TTLCache:
+    """LRU + TTL ক্যাশ; প্রতিটি ক্যাশ নিজের hit/miss গণনা রাখে।"""
+    def __init__(self, name, maxsize, ttl):
+        self.name, self.maxsize, self.ttl = name, maxsize, ttl
+        self.data, self.hits, self.misses = OrderedDict(), 0, 0
+
+    def get(self, key):
+        item = self.data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None: del self.data[key]
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key, value):
+        self.data[key] = (time.monotonic() + self.ttl, value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize: self.data.popitem(last=False)
+
+    def pop(self, key):
+        self.data.pop(key, None)
+
+    def discard_where(self, predicate):
+        for key in [key for key, (_, value) in self.data.items() if predicate(value)]: del self.data[key]
+
+    def clear(self):
+        self.data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return f"{self.name}: `{self.hits}/{total}` hit ({self.hits * 100 // total if total else 0}%), size `{len(self.data)}`"
+
+movie_cache = TTLCache("movies", 5000, 3600)
+files_cache = TTLCache("file lists", 5000, 3600)
+file_cache = TTLCache("files", 20000, 3600)
+search_cache = TTLCache("searches", 2000, 300)
+user_cache = TTLCache("users", 20000, 3600)
+CACHES = [movie_cache, files_cache, file_cache, search_cache, user_cache]
+
+async def get_movie(movie_id):
+    movie = movie_cache.get(movie_id)
+    if movie is None:
+        movie = await movie_info_db.find_one({"_id": movie_id}, {"title": 1, "year": 1})
+        if movie: movie_cache.set(movie_id, movie)
+    return movie
+
+async def get_movies(movie_ids):
+    found = {movie_id: movie for movie_id in movie_ids if (movie := movie_cache.get(movie_id)) is not None}
+    missing = [movie_id for movie_id in movie_ids if movie_id not in found]
+    if missing:
+        async for movie in movie_info_db.find({"_id": {"$in": missing}}, {"title": 1, "year": 1}):
+            movie_cache.set(movie['_id'], movie); found[movie['_id']] = movie
+    return [found[movie_id] for movie_id in movie_ids if movie_id in found]
+
+async def get_movie_files(movie_id):
+    files = files_cache.get(movie_id)
+    if files is None:
+        files = await files_db.find({"movie_id": movie_id}).sort([("episode", 1), ("quality", 1)]).to_list(length=None)
+        files_cache.set(movie_id, files)
+        for file_doc in files: file_cache.set(file_doc['_id'], file_doc)
+    return files
+
+async def get_file_with_movie(file_id):
+    file_doc = file_cache.get(file_id)
+    if file_doc is None:
+        pipeline = [{"$match": {"_id": file_id}}, {"$lookup": {"from": movie_info_db.name, "localField": "movie_id", "foreignField": "_id", "as": "movie"}}]
+        docs = await files_db.aggregate(pipeline).to_list(length=1)
+        if not docs: return None, None
+        file_doc, movies = docs[0], docs[0].pop("movie")
+        file_cache.set(file_id, file_doc)
+        if movies: movie_cache.set(movies[0]['_id'], movies[0])
+    return file_doc, await get_movie(file_doc['movie_id'])
+
+def invalidate_movie(movie_id):
+    movie_cache.pop(movie_id); files_cache.pop(movie_id); search_cache.clear()
+    file_cache.discard_where(lambda file_doc: file_doc['movie_id'] == movie_id)
+
+# ========= 🚦 রেট লিমিট ও কোয়েরি কোলেসিং ========= #
+class SingleFlight:
+    """একই কী-র জন্য একসাথে আসা অনুরোধগুলো একটিমাত্র চলমান ডাটাবেস লুকআপের ফল ভাগ করে নেয়।"""
+    def __init__(self):
+        self.inflight, self.coalesced = {}, 0
+
+    async def do(self, key, func):
+        task = self.inflight.get(key)
+        if task is not None: self.coalesced += 1
+        else:
+            task = self.inflight[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+class TokenBucket:
+    """প্রতি কী-র জন্য টোকেন বাকেট; consume() 0 দিলে অনুমোদিত, নাহলে পরের টোকেনের অপেক্ষার সময় (সেকেন্ড)।"""
+    def __init__(self, rate, burst, max_keys=50000):
+        self.rate, self.burst, self.max_keys = rate, burst, max_keys
+        self.buckets, self.throttled = OrderedDict(), 0
+
+    def consume(self, key):
+        now = time.monotonic()
+        tokens, updated = self.buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+        if wait: self.throttled += 1
+        else: tokens -= 1
+        self.buckets[key] = (tokens, now)
+        while len(self.buckets) > self.max_keys: self.buckets.popitem(last=False)
+        return wait
+
+search_flight = SingleFlight()
+user_search_limiter = TokenBucket(USER_SEARCH_RATE, USER_SEARCH_BURST)
+chat_search_limiter = TokenBucket(CHAT_SEARCH_RATE, CHAT_SEARCH_BURST)
+
+# ========= 📤 আউটবাউন্ড সেন্ড কিউ ========= #
+class SendQueue:
+    """অগ্রাধিকারভিত্তিক আউটবাউন্ড কিউ: গ্লোবাল ও প্রতি-চ্যাট রেট লিমিট মানে, FloodWait পেলে সেই সময় অপেক্ষা করে আবার পাঠায়।"""
+    INTERACTIVE, BULK = 0, 1
+
+    def __init__(self, global_rate, chat_rate, chat_burst, concurrency, max_retries=3):
+        self.global_limiter, self.chat_limiter = TokenBucket(global_rate, global_rate), TokenBucket(chat_rate, chat_burst)
+        self.concurrency, self.max_retries = concurrency, max_retries
+        self.ready, self.delayed, self.seq, self.wakeup = [], [], itertools.count(), asyncio.Event()
+        self.paused_until, self.semaphore, self.task = 0, None, None
+        self.sent, self.flood_waits, self.failed = Counter(), 0, 0
+
+    def send(self, chat_id, func, *args, priority=INTERACTIVE, **kwargs):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.ready, (priority, next(self.seq), [chat_id, func, args, kwargs, future, 0]))
+        self.wakeup.set()
+        return future
+
+    def __len__(self):
+        return len(self.ready) + len(self.delayed)
+
+    def start(self):
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task: self.task.cancel()
+
+    async def _run(self):
+        while True:
+            try:
+                now = time.monotonic()
+                while self.delayed and self.delayed[0][0] <= now:
+                    _, seq, priority, job = heapq.heappop(self.delayed)
+                    heapq.heappush(self.ready, (priority, seq, job))
+                if now < self.paused_until: await asyncio.sleep(self.paused_until - now); continue
+                if not self.ready:
+                    self.wakeup.clear()
+                    timeout = self.delayed[0][0] - now if self.delayed else None
+                    try: await asyncio.wait_for(self.wakeup.wait(), timeout)
+                    except asyncio.TimeoutError: pass
+                    continue
+                priority, seq, job = heapq.heappop(self.ready)
+                if (wait := self.chat_limiter.consume(job[0])):
+                    heapq.heappush(self.delayed, (now + wait, seq, priority, job)); continue
+                while (wait := self.global_limiter.consume(None)): await asyncio.sleep(wait)
+                await self.semaphore.acquire()
+                asyncio.create_task(self._execute(priority, seq, job))
+            except asyncio.CancelledError: raise
+            except Exception as e: LOGGER.error(f"Send queue error: {e}"); await asyncio.sleep(1)
+
+    async def _execute(self, priority, seq, job):
+        chat_id, func, args, kwargs, future, attempt = job
+        try: result = await func(*args, **kwargs)
+        except FloodWait as e:
+            self.flood_waits += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + e.value)
+            LOGGER.warning(f"FloodWait of {e.value}s while sending to {chat_id} (attempt {attempt + 1}).")
+            if attempt < self.max_retries:
+                job[5] += 1
+                heapq.heappush(self.ready, (priority, seq, job)); self.wakeup.set()
+            elif not future.done(): self.failed += 1; future.set_exception(e)
+        except Exception as e:
+            if not isinstance(e, MessageNotModified): self.failed += 1  # একই লেখায় এডিট — কলার নিজেই এড়িয়ে যায়, ব্যর্থতা নয়
+            if not future.done(): future.set_exception(e)
+        else:
+            self.sent[priority] += 1
+            if not future.done(): future.set_result(result)
+        finally: self.semaphore.release()
+
+send_queue = SendQueue(GLOBAL_SEND_RATE, CHAT_SEND_RATE, CHAT_SEND_BURST, SEND_CONCURRENCY)
+
+async def reply(message, text, **kwargs):
+    return await send_queue.send(message.chat.id, message.reply_text, text, **kwargs)
+
+async def edit(message, text, **kwargs):
+    return await send_queue.send(message.chat.id, message.edit_text, text, **kwargs)
+
+# ========= 🗝️ সার্চ সেশন ========= #
+search_sessions = TTLCache("sessions", 20000, DELETE_DELAY)
+
+def create_search_session(query, ids):
+    """callback_data-তে পুরো কোয়েরির বদলে ছোট টোকেন যায়; পেজ বদলাতে আর কোয়েরি চালাতে হয় না।"""
+    token = secrets.token_hex(4)
+    session = {"token": token, "query": query, "ids": ids}
+    search_sessions.set(token, session)
+    return session
+
+# ========= 🗃️ ডাটাবেস ইনডেক্স ========= #
+INDEXES = {
+    "movie_info": [IndexModel([("title_lower", 1), ("year", 1)], unique=True, name="title_lower_1_year_1"),
+                   IndexModel([("title_tokens", 1)], name="title_tokens_1")],
+    "files": [IndexModel([("movie_id", 1), ("quality", 1), ("language", 1), ("episode", 1)], unique=True, name="movie_id_1_quality_1_language_1_episode_1")],
+}
+# নতুন ইনডেক্স তৈরির পর যেগুলো বাদ যাবে
+OBSOLETE_INDEXES = {"files": ["movie_id_1_quality_1_language_1"]}
+
+# প্রোডাকশনে চলা প্রতিটি কোয়েরির আকার: (নাম, কালেকশন, ফিল্টার, সর্ট)
+QUERY_SHAPES = [
+    ("search", "movie_info", {"$and": [{"title_tokens": re.compile("^a")}, {"title_tokens": re.compile("^b")}]}, {"_id": 1}),
+    ("indexer movie lookup", "movie_info", {"$or": [{"title_lower": "x", "year": "2000"}, {"title_lower": "y", "year": None}]}, None),
+    ("movie by id", "movie_info", {"_id": {"$in": [ObjectId()]}}, None),
+    ("files of a movie", "files", {"movie_id": ObjectId()}, {"episode": 1, "quality": 1}),
+    ("file upsert key", "files", {"movie_id": ObjectId(), "quality": "720p", "language": "Hindi", "episode": None}, None),
+    ("file by id", "files", {"_id": ObjectId()}, None),
+    ("broadcast cursor", "users", {"_id": {"$gt": 0}}, {"_id": 1}),
+    ("due deletions cleanup", "pending_deletes", {"_id": {"$in": [ObjectId()]}}, None),
+]
+
+async def ensure_indexes():
+    for collection, models in INDEXES.items():
+        for model in models:
+            try: await db[collection].create_indexes([model])
+            except OperationFailure as e: LOGGER.error(f"Could not create index {model.document['name']} on {collection} (duplicates must be merged first): {e}")
+    for collection, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing and all(model.document['name'] in existing for model in INDEXES[collection]):
+                await db[collection].drop_index(name); LOGGER.info(f"🗑️ Dropped superseded index {name} on {collection}.")
+    LOGGER.info(f"🗃️ Ensured {sum(len(models) for models in INDEXES.values())} indexes.")
+
+def find_plan_stages(plan):
+    if isinstance(plan, dict):
+        stages = [(plan['stage'], plan.get('indexName'))] if 'stage' in plan else []
+        return stages + [stage for value in plan.values() for stage in find_plan_stages(value)]
+    if isinstance(plan, list): return [stage for value in plan for stage in find_plan_stages(value)]
+    return []
+
+async def explain_query_shapes():
+    report = []
+    for name, collection, query, sort in QUERY_SHAPES:
+        command = {"find": collection, "filter": query, **({"sort": sort} if sort else {})}
         try:
-            if msg: await msg.delete()
-        except Exception: pass
+            explain = await db.command({"explain": command, "verbosity": "queryPlanner"})
+            stages = find_plan_stages(explain['queryPlanner']['winningPlan'])
+        except Exception as e: report.append((name, None, str(e))); continue
+        report.append((name, any(stage == "COLLSCAN" for stage, _ in stages), " → ".join(f"{stage}({index})" if index else stage for stage, index in stages)))
+    return report
+
+async def bulk_upsert(collection, operations):
+    """ডুপ্লিকেট-কি (একসাথে আপলোডের রেস) ত্রুটি উপেক্ষা করে; (upserted, modified) ফেরত দেয়।"""
+    if not operations: return 0, 0
+    try:
+        result = await collection.bulk_write(operations, ordered=False)
+        return result.upserted_count, result.modified_count
+    except BulkWriteError as e:
+        if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])): raise
+        return e.details.get('nUpserted', 0), e.details.get('nModified', 0)
+
+# ========= 🔤 টোকেন সার্চ ইনডেক্স ========= #
+def tokenize(text):
+    return re.findall(r'[a-z0-9]+', (text or "").lower())
+
+async def search_movies(query, page_size=SEARCH_PAGE_SIZE):
+    """title_tokens মাল্টিকি ইনডেক্সে প্রিফিক্স ম্যাচ; একটি কোয়েরিতেই প্রথম পাতা ও সাজানো আইডি তালিকা ফেরত দেয়।"""
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens: return [], []
+    cache_key = ' '.join(tokens)
+    if (ids := search_cache.get(cache_key)) is not None: return await get_movies(ids[:page_size]), ids
+    return await search_flight.do((cache_key, page_size), lambda: run_token_search(tokens, page_size))
+
+async def run_token_search(tokens, page_size):
+    match = {"$and": [{"title_tokens": re.compile(f"^{re.escape(token)}")} for token in tokens]}
+    pipeline = [{"$match": match}, {"$sort": {"_id": 1}}, {"$limit": MAX_SEARCH_RESULTS},
+                {"$facet": {"results": [{"$limit": page_size}, {"$project": {"title": 1, "year": 1}}], "ids": [{"$project": {"_id": 1}}]}}]
+    facet = (await movie_info_db.aggregate(pipeline).to_list(length=1))[0]
+    ids = [doc['_id'] for doc in facet["ids"]]
+    for movie in facet["results"]: movie_cache.set(movie['_id'], movie)
+    search_cache.set(' '.join(tokens), ids)
+    return facet["results"], ids
+
+async def ensure_title_tokens():
+    updates = [UpdateOne({"_id": doc['_id']}, {"$set": {"title_tokens": tokenize(doc['title'])}}) async for doc in movie_info_db.find({"title_tokens": {"$exists": False}}, {"title": 1})]
+    if updates:
+        await movie_info_db.bulk_write(updates, ordered=False)
+        LOGGER.info(f"🔤 Backfilled search tokens for {len(updates)} movies.")
+
+# ========= 💡 সাজেশন ইনডেক্স (ট্রাইগ্রাম) ========= #
+class SuggestionIndex:
+    """মেমোরিতে থাকা ট্রাইগ্রাম ইনডেক্স: প্রার্থী বাছাই করে শুধু সেগুলোর উপর fuzzy স্কোর চালায়।"""
+    def __init__(self, max_candidates=200, posting_budget=5000):
+        self.max_candidates, self.posting_budget = max_candidates, posting_budget
+        self.entries, self.grams = {}, defaultdict(set)
+
+    @staticmethod
+    def _trigrams(text):
+        padded = f"  {' '.join(re.findall(r'[a-z0-9]+', text.lower()))} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, doc):
+        self.remove(doc['_id'])
+        self.entries[doc['_id']] = (f"{doc['title']} ({doc.get('year') or 'N/A'})", doc['title'], doc.get('year'))
+        for gram in self._trigrams(doc['title']): self.grams[gram].add(doc['_id'])
+
+    def remove(self, movie_id):
+        entry = self.entries.pop(movie_id, None)
+        if not entry: return
+        for gram in self._trigrams(entry[1]):
+            ids = self.grams.get(gram)
+            if ids is None: continue
+            ids.discard(movie_id)
+            if not ids: del self.grams[gram]
+
+    def clear(self):
+        self.entries.clear(); self.grams.clear()
+
+    async def build(self):
+        self.clear()
+        async for doc in movie_info_db.find({}, {"title": 1, "year": 1}): self.add(doc)
+        LOGGER.info(f"💡 Suggestion index built with {len(self.entries)} titles and {len(self.grams)} trigrams.")
+
+    def search(self, query, threshold=75, limit=3):
+        """দুর্লভ ট্রাইগ্রাম আগে গোনা হয়; posting_budget ছাড়ানো সাধারণ ট্রাইগ্রাম ("the") বাদ পড়ে, তাই খরচ ক্যাটালগের আকারে বাড়ে না।"""
+        hits, budget = Counter(), self.posting_budget
+        for ids in sorted((self.grams[gram] for gram in self._trigrams(query) if gram in self.grams), key=len):
+            if len(ids) > budget:
+                if not hits: hits.update(itertools.islice(ids, budget))
+                break
+            hits.update(ids); budget -= len(ids)
+        if not hits: return []
+        choices = {movie_id: self.entries[movie_id][0] for movie_id, _ in hits.most_common(self.max_candidates)}
+        return [{"title": self.entries[movie_id][1], "year": self.entries[movie_id][2], "_id": movie_id}
+                for _, score, movie_id in process.extract(query, choices, limit=limit) if score >= threshold]
+
+suggestion_index = SuggestionIndex()
 
 # ========= 📢 নমনীয় ইনডেক্সিং হ্যান্ডলার ========= #
+def episode_label(season, episode):
+    if season is None: return None
+    return f"S{season:02d}E{episode:02d}" if episode is not None else f"S{season:02d}"
+
+def parse_file_messages(messages):
+    """একসাথে অনেক মেসেজের ক্যাপশন caption_parser দিয়ে পার্স করে; ক্যাপশনে টাইটেল না পেলে ফাইলের নাম দেখে, তাতেও না পেলে বাদ যায়।"""
+    messages = [message for message in messages if message.video or message.document]
+    parsed = parse_captions([(message.caption or "", (message.video or message.document).file_name) for message in messages])
+    entries = []
+    for message, info in zip(messages, parsed):
+        if not info['title']:
+            LOGGER.warning(f"Skipped post {message.id} in {message.chat.id}: no title in caption or file name.")
+            continue
+        file_info = message.video or message.document
+        entries.append({"title": info['title'], "year": info['year'], "quality": info['quality'] or "Unknown", "language": " + ".join(info['languages']) or "Unknown",
+                        "episode": episode_label(info['season'], info['episode']), "codec": info['codec'], "size": info['size'],
+                        "file_id": file_info.file_id, "chat_id": message.chat.id, "msg_id": message.id})
+    return entries
+
+def parse_file_message(message):
+    entries = parse_file_messages([message])
+    return entries[0] if entries else None
+
+class IndexWriter:
+    """ইনডেক্সিং এন্ট্রি জমিয়ে দুই কালেকশনে grouped bulk_write করে; লাইভ হ্যান্ডলার ও ব্যাকফিল একই পথ ব্যবহার করে।"""
+    def __init__(self, batch_size=INDEX_BATCH_SIZE, max_delay=0.5, retry_delay=5):
+        self.batch_size, self.max_delay, self.retry_delay = batch_size, max_delay, retry_delay
+        self.pending, self.lock, self.timer, self.written = [], asyncio.Lock(), None, 0
+
+    async def add(self, *entries):
+        self.pending.extend(entry for entry in entries if entry)
+        if len(self.pending) >= self.batch_size: await self.flush()
+        elif self.pending and not self.timer: self.timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self, delay=None):
+        await asyncio.sleep(self.max_delay if delay is None else delay)
+        self.timer = None
+        await self.flush()
+
+    async def flush(self, raise_errors=False):
+        """ব্যর্থ ব্যাচ হারায় না, pending-এর সামনে ফিরে গিয়ে retry_delay পরে আবার চেষ্টা হয়; ব্যাকফিল raise_errors=True দিয়ে ডাকে যাতে চেকপয়েন্ট না এগোয়।"""
+        async with self.lock:
+            while self.pending:
+                batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+                try:
+                    with metrics.timer("bot_handler_seconds", handler="indexer"): self.written += await self._write(batch)
+                except Exception as e:
+                    self.pending[:0] = batch
+                    LOGGER.error(f"Failed to index a batch of {len(batch)} files, retrying in {self.retry_delay}s: {e}")
+                    if not self.timer: self.timer = asyncio.create_task(self._flush_later(self.retry_delay))
+                    if raise_errors: raise
+                    break
+        return self.written
+
+    async def _write(self, batch):
+        movie_keys = {(entry['title'].lower(), entry['year']): entry for entry in batch}
+        movies_upserted, _ = await bulk_upsert(movie_info_db, [UpdateOne({"title_lower": title_lower, "year": year}, {"$setOnInsert": {"title": entry['title'], "year": year, "title_lower": title_lower, "title_tokens": tokenize(entry['title'])}}, upsert=True)
+                                        for (title_lower, year), entry in movie_keys.items()])
+        movies = {(doc['title_lower'], doc.get('year')): doc async for doc in movie_info_db.find({"$or": [{"title_lower": title_lower, "year": year} for title_lower, year in movie_keys]}, {"title": 1, "year": 1, "title_lower": 1})}
+        file_ops = {}
+        for entry in batch:
+            movie = movies.get((entry['title'].lower(), entry['year']))
+            if not movie: continue
+            key = {"movie_id": movie['_id'], "quality": entry['quality'], "language": entry['language'], "episode": entry['episode']}
+            file_ops[tuple(key.values())] = UpdateOne(key, {"$set": {field: entry[field] for field in ("file_id", "chat_id", "msg_id", "codec", "size")}}, upsert=True)
+        _, files_modified = await bulk_upsert(files_db, list(file_ops.values()))
+        for movie in movies.values():
+            suggestion_index.add(movie); files_cache.pop(movie['_id'])
+        if movies_upserted: search_cache.clear()
+        if files_modified: file_cache.clear()
+        LOGGER.info(f"✅ Indexed {len(file_ops)} files for {len(movies)} movies in one batch.")
+        return len(file_ops)
+
+index_writer = IndexWriter()
+
 @app.on_message(filters.channel & (filters.video | filters.document))
 async def flexible_save_movie_quality(client, message):
     if message.chat.id != FILE_CHANNEL_ID: return
-    caption = message.caption or ""
-    title_match = re.search(r"(.+?)\s*\(?(\d{4})\)?", caption, re.IGNORECASE)
-    year = title_match.group(2) if title_match else None
-    raw_title = title_match.group(1).strip() if title_match else ' '.join(caption.split()[:5])
-    if not raw_title: raw_title = (message.video or message.document).file_name
-    
-    clean_title = re.sub(r'[\.\_]', ' ', raw_title).strip()
-    quality = next((q for q in ["480p", "720p", "1080p", "2160p", "4k"] if q in caption.lower()), "Unknown")
-    languages = next((lang.capitalize() for lang in ["hindi", "bangla", "bengali", "english", "tamil", "telugu"] if lang in caption.lower()), "Unknown")
-    language = "Bangla" if languages in ["Bangla", "Bengali"] else languages
-    
-    query = {"title_lower": clean_title.lower()}
-    if year: query["year"] = year
-    movie_doc = await movie_info_db.find_one_and_update(query, {"$setOnInsert": {"title": clean_title, "year": year, "title_lower": clean_title.lower()}}, upsert=True, return_document=True)
-    
-    file_info = message.video or message.document
-    await files_db.update_one({"movie_id": movie_doc['_id'], "quality": quality, "language": language}, {"$set": {"file_id": file_info.file_id, "chat_id": message.chat.id, "msg_id": message.id}}, upsert=True)
-    
-    LOGGER.info(f"✅ Indexed: {clean_title} ({year or 'N/A'}) [{quality} - {language}]")
+    entry = parse_file_message(message)
+    if not entry: return
+    await index_writer.add(entry)
+    LOGGER.info(f"📥 Queued: {entry['title']} ({entry['year'] or 'N/A'}) [{entry['episode'] or 'Movie'} - {entry['quality']} - {entry['language']}]")
+
+# ========= 🗂️ চ্যানেল ব্যাকফিল ========= #
+backfill_task = None
+
+async def run_backfill(client, status_msg, state):
+    started, scanned, indexed, empty_chunks, last_report = time.time(), 0, 0, 0, 0
+    written_before = index_writer.written
+    while state.get('end_id') is None or state['next_id'] <= state['end_id']:
+        chunk_end = state['next_id'] + BACKFILL_CHUNK_SIZE
+        if state.get('end_id') is not None: chunk_end = min(chunk_end, state['end_id'] + 1)
+        messages = await client.get_messages(FILE_CHANNEL_ID, list(range(state['next_id'], chunk_end)))
+        found = [msg for msg in messages if msg and not msg.empty]
+        empty_chunks = 0 if found else empty_chunks + 1
+        if state.get('end_id') is None and empty_chunks >= BACKFILL_EMPTY_LIMIT:
+            state['next_id'] -= (BACKFILL_EMPTY_LIMIT - 1) * BACKFILL_CHUNK_SIZE
+            break
+        await index_writer.add(*parse_file_messages(found))
+        indexed = await index_writer.flush(raise_errors=True) - written_before
+        scanned += len(found)
+        state.update(next_id=chunk_end, scanned=state.get('scanned', 0) + len(found))
+        await state_db.update_one({"_id": "backfill"}, {"$set": state}, upsert=True)
+        if time.time() - last_report >= 10:
+            last_report, rate = time.time(), scanned / max(time.time() - started, 1e-6)
+            try: await edit(status_msg, f"⏳ **ইনডেক্সিং চলছে...**\n\n📍 পরবর্তী মেসেজ: `{state['next_id']}`\n🔎 স্ক্যান: `{scanned}`\n📁 ইনডেক্স: `{indexed}`\n⚡ গতি: `{rate:.1f}` msg/s")
+            except MessageNotModified: pass
+    elapsed = time.time() - started
+    await state_db.update_one({"_id": "backfill"}, {"$set": {"next_id": state['next_id'], "done": True}}, upsert=True)
+    LOGGER.info(f"🗂️ Backfill finished: {scanned} messages scanned, {indexed} files indexed in {elapsed:.1f}s.")
+    await edit(status_msg, f"✅ **ইনডেক্সিং সম্পন্ন!**\n\n🔎 স্ক্যান: `{scanned}`\n📁 ইনডেক্স: `{indexed}`\n⏱️ সময়: `{elapsed:.1f}s`\n⚡ গতি: `{scanned / max(elapsed, 1e-6):.1f}` msg/s")
+
+async def backfill_runner(client, status_msg, state):
+    global backfill_task
+    try: await run_backfill(client, status_msg, state)
+    except Exception as e:
+        LOGGER.error(f"Backfill stopped at message {state['next_id']}: {e}")
+        try: await state_db.update_one({"_id": "backfill"}, {"$set": {**state, "done": False}}, upsert=True)
+        except Exception as save_error: LOGGER.error(f"Could not save the backfill checkpoint: {save_error}")
+        await edit(status_msg, f"❌ ইনডেক্সিং `{state['next_id']}` নম্বর মেসেজে থেমে গেছে। `/index` দিয়ে আবার চালু করুন।\n\n**কারণ:** `{e}`")
+    finally: backfill_task = None
+
+# ========= 📣 ব্রডকাস্ট ========= #
+broadcast_task = None
+
+async def broadcast_to_user(client, state, user_id):
+    try:
+        await send_queue.send(user_id, client.copy_message, user_id, state['from_chat_id'], state['message_id'], priority=SendQueue.BULK)
+        return "delivered"
+    except (UserIsBlocked, InputUserDeactivated, UserDeactivated, PeerIdInvalid): return "blocked"
+    except Exception as e: LOGGER.debug(f"Broadcast to {user_id} failed: {e}"); return "failed"
+
+def broadcast_report(state, elapsed, title, processed_before=0):
+    """গতি শুধু এই রানের পাঠানো মেসেজ থেকে; resume-এর আগের সংখ্যা processed_before বাদ যায়।"""
+    processed = state['delivered'] + state['blocked'] + state['failed'] - processed_before
+    return (f"{title}\n\n✅ পৌঁছেছে: `{state['delivered']}`\n🚫 ব্লকড: `{state['blocked']}`\n❌ ব্যর্থ: `{state['failed']}`\n"
+            f"⏱️ সময়: `{elapsed:.1f}s`\n⚡ গতি: `{processed / max(elapsed, 1e-6):.1f}` msg/s")
+
+async def run_broadcast(client, status_msg, state):
+    started, last_report, batch = time.time(), time.time(), []
+    query = {} if state.get('last_user_id') is None else {"_id": {"$gt": state['last_user_id']}}
+    processed_before = state['delivered'] + state['blocked'] + state['failed']
+
+    async def deliver(batch):
+        for outcome in await asyncio.gather(*(broadcast_to_user(client, state, user_id) for user_id in batch)): state[outcome] += 1
+        state['last_user_id'] = batch[-1]
+        await state_db.update_one({"_id": "broadcast"}, {"$set": state}, upsert=True)
+
+    async for user in users_db.find(query, {"_id": 1}).sort("_id", 1).batch_size(BROADCAST_BATCH_SIZE * 4):
+        batch.append(user['_id'])
+        if len(batch) < BROADCAST_BATCH_SIZE: continue
+        await deliver(batch); batch = []
+        if time.time() - last_report >= 10:
+            last_report, elapsed = time.time(), time.time() - started
+            try: await edit(status_msg, broadcast_report(state, elapsed, "📣 **ব্রডকাস্ট চলছে...**", processed_before))
+            except MessageNotModified: pass
+    if batch: await deliver(batch)
+    state['done'] = True
+    await state_db.update_one({"_id": "broadcast"}, {"$set": {"done": True}}, upsert=True)
+    elapsed = time.time() - started
+    LOGGER.info(f"📣 Broadcast finished: {state['delivered']} delivered, {state['blocked']} blocked, {state['failed']} failed "
+                f"({state['delivered'] + state['blocked'] + state['failed'] - processed_before} sent in {elapsed:.1f}s).")
+    await edit(status_msg, broadcast_report(state, elapsed, "✅ **ব্রডকাস্ট সম্পন্ন!**", processed_before))
+
+async def start_broadcast(client, message, source):
+    """সোর্স মেসেজ আগে LOG_CHANNEL_ID-তে কপি হয়; অটো-ডিলিট হলেও ব্রডকাস্ট ও `/broadcast resume` সেই কপি থেকেই চলে।"""
+    global broadcast_task
+    if broadcast_task: return await reply(message, "⏳ একটি ব্রডকাস্ট আগে থেকেই চলছে।")
+    try: stored = await send_queue.send(LOG_CHANNEL_ID, source.copy, LOG_CHANNEL_ID)
+    except Exception as e: return await reply(message, f"❌ ব্রডকাস্টের মেসেজটি লগ চ্যানেলে রাখা যায়নি।\n\n**কারণ:** `{e}`")
+    state = {"from_chat_id": LOG_CHANNEL_ID, "message_id": stored.id, "last_user_id": None, "delivered": 0, "blocked": 0, "failed": 0, "done": False}
+    await state_db.replace_one({"_id": "broadcast"}, state, upsert=True)
+    status_msg = await reply(message, "📣 ব্রডকাস্ট শুরু হচ্ছে...", quote=True)
+    broadcast_task = asyncio.create_task(broadcast_runner(client, status_msg, state))
+
+async def broadcast_runner(client, status_msg, state):
+    global broadcast_task
+    try: await run_broadcast(client, status_msg, state)
+    except Exception as e:
+        LOGGER.error(f"Broadcast stopped after user {state.get('last_user_id')}: {e}")
+        await edit(status_msg, f"❌ ব্রডকাস্ট মাঝপথে থেমে গেছে। `/broadcast resume` দিয়ে আবার চালু করুন।\n\n**কারণ:** `{e}`")
+    finally: broadcast_task = None
 
 # ========= 👮 অ্যাডমিন কমান্ড ========= #
 @app.on_message(filters.command("stats") & admin_filter)
 async def stats_command(client, message):
-    total_users, total_movies, total_files = await asyncio.gather(users_db.count_documents({}), movie_info_db.count_documents({}), files_db.count_documents({}))
-    await message.reply_text(f"📊 **Bot Stats**\n\n👥 Users: `{total_users}`\n🎬 Movies: `{total_movies}`\n📁 Files: `{total_files}`\n\n📢 **Indexing Channel:** `{FILE_CHANNEL_ID}`\n🔔 **Log Channel:** `{LOG_CHANNEL_ID}`")
+    total_users, total_movies, total_files = await asyncio.gather(users_db.estimated_document_count(), movie_info_db.estimated_document_count(), files_db.estimated_document_count())
+    await reply(message, f"📊 **Bot Stats**\n\n👥 Users: `{total_users}`\n🎬 Movies: `{total_movies}`\n📁 Files: `{total_files}`\n\n🧠 **Cache**\n" + "\n".join(cache.stats() for cache in CACHES) + f"\n\n🚦 **Search Guard**\nCoalesced: `{search_flight.coalesced}` | Throttled: `{user_search_limiter.throttled + chat_search_limiter.throttled}`\n\n📤 **Send Queue**\nSent: `{send_queue.sent[SendQueue.INTERACTIVE]}` interactive / `{send_queue.sent[SendQueue.BULK]}` bulk | Pending: `{len(send_queue)}` | FloodWaits: `{send_queue.flood_waits}` | Failed: `{send_queue.failed}`\n\n📢 **Indexing Channel:** `{FILE_CHANNEL_ID}`\n🔔 **Log Channel:** `{LOG_CHANNEL_ID}`")
 
-@app.on_message(admin_filter & filters.reply)
+# শুধু বটের ForceReply প্রম্পটের উত্তর; অন্য রিপ্লাই (যেমন `/broadcast`) পরের হ্যান্ডলারে যায়।
+@app.on_message(admin_filter & filters.reply & force_reply_filter)
 async def admin_reply_handler(client, message):
-    if not (message.reply_to_message and message.reply_to_message.reply_markup and isinstance(message.reply_to_message.reply_markup, ForceReply)): return
     placeholder = message.reply_to_message.reply_markup.placeholder
+    if placeholder == "broadcast": return await start_broadcast(client, message, message)
     if placeholder and placeholder.startswith("reply_to_"):
         try: target_user_id = int(placeholder.split("reply_to_")[1])
-        except (ValueError, IndexError): return await message.reply_text("❌ এই রিপ্লাই থেকে ব্যবহারকারীর আইডি পাওয়া যায়নি।")
+        except (ValueError, IndexError): return await reply(message, "❌ এই রিপ্লাই থেকে ব্যবহারকারীর আইডি পাওয়া যায়নি।")
         try:
-            await message.copy(chat_id=target_user_id)
-            confirmation_msg = await message.reply_text("✅ আপনার বার্তা ব্যবহারকারীর কাছে সফলভাবে পাঠানো হয়েছে।")
-            asyncio.create_task(delete_messages_after_delay([message.reply_to_message, confirmation_msg, message], 30))
-        except Exception as e: await message.reply_text(f"❌ বার্তা পাঠাতে ব্যর্থ। ব্যবহারকারী হয়তো বটকে ব্লক করেছে।\n\n**কারণ:** `{e}`")
+            await send_queue.send(target_user_id, message.copy, chat_id=target_user_id)
+            confirmation_msg = await reply(message, "✅ আপনার বার্তা ব্যবহারকারীর কাছে সফলভাবে পাঠানো হয়েছে।")
+            delete_scheduler.schedule([message.reply_to_message, confirmation_msg, message], 30)
+        except Exception as e: await reply(message, f"❌ বার্তা পাঠাতে ব্যর্থ। ব্যবহারকারী হয়তো বটকে ব্লক করেছে।\n\n**কারণ:** `{e}`")
+
+@app.on_message(filters.command("index") & admin_filter)
+async def backfill_command(client, message):
+    global backfill_task
+    if backfill_task: return await reply(message, "⏳ একটি ইনডেক্সিং আগে থেকেই চলছে।")
+    args = message.command[1:]
+    if args:
+        try: state = {"next_id": int(args[0]), "end_id": int(args[1]) if len(args) > 1 else None, "scanned": 0, "done": False}
+        except ValueError: return await reply(message, "⚠️ **ব্যবহার:** `/index <শুরুর মেসেজ আইডি> [শেষ মেসেজ আইডি]`\nশুধু `/index` দিলে আগের চেকপয়েন্ট থেকে আবার শুরু হবে।")
+    else:
+        state = await state_db.find_one({"_id": "backfill"}, {"_id": 0})
+        if not state or state.get('done'): return await reply(message, "⚠️ চালু করার মতো কোনো অসম্পূর্ণ ইনডেক্সিং নেই।\n\n**ব্যবহার:** `/index <শুরুর মেসেজ আইডি> [শেষ মেসেজ আইডি]`")
+    status_msg = await reply(message, f"⏳ মেসেজ `{state['next_id']}` থেকে ইনডেক্সিং শুরু হচ্ছে...", quote=True)
+    backfill_task = asyncio.create_task(backfill_runner(client, status_msg, state))
+
+@app.on_message(filters.command("broadcast") & admin_filter)
+async def broadcast_command(client, message):
+    global broadcast_task
+    if broadcast_task: return await reply(message, "⏳ একটি ব্রডকাস্ট আগে থেকেই চলছে।")
+    usage = "⚠️ **ব্যবহার:** `/broadcast` দিয়ে বটের প্রম্পটের রিপ্লাইতে মেসেজটি পাঠান, অথবা আগের কোনো মেসেজের রিপ্লাইতে `/broadcast` লিখুন।\nথেমে যাওয়া ব্রডকাস্ট চালু করতে `/broadcast resume` দিন।"
+    if message.command[1:] == ["resume"]:
+        state = await state_db.find_one({"_id": "broadcast"}, {"_id": 0})
+        if not state or state.get('done'): return await reply(message, "⚠️ চালু করার মতো কোনো অসম্পূর্ণ ব্রডকাস্ট নেই।\n\n" + usage)
+    elif message.reply_to_message: return await start_broadcast(client, message, message.reply_to_message)
+    else:
+        # প্রম্পটের উত্তর admin_reply_handler-এ যায়, তাই লেখাটি সার্চ হিসেবে ধরা হয় না বা অটো-ডিলিট হয় না।
+        return await reply(message, "📣 যে মেসেজটি সবাইকে পাঠাতে চান সেটি এই মেসেজের রিপ্লাইতে পাঠান।", reply_markup=ForceReply(selective=True, placeholder="broadcast"))
+    status_msg = await reply(message, "📣 ব্রডকাস্ট শুরু হচ্ছে...", quote=True)
+    broadcast_task = asyncio.create_task(broadcast_runner(client, status_msg, state))
+
+@app.on_message(filters.command("explain") & admin_filter)
+async def explain_command(client, message):
+    report = await explain_query_shapes()
+    lines = [f"{'❔' if collscan is None else '⚠️' if collscan else '✅'} **{name}**: `{plan}`" for name, collscan, plan in report]
+    slow = sum(1 for _, collscan, _ in report if collscan)
+    await reply(message, "🔬 **Query Plan Audit**\n\n" + "\n".join(lines) + f"\n\n{'⚠️ ' + str(slow) + 'টি কোয়েরি COLLSCAN ব্যবহার করছে।' if slow else '✅ সব কোয়েরি ইনডেক্স ব্যবহার করছে।'}", quote=True)
 
 @app.on_message(filters.command("del") & admin_filter)
 async def delete_movie_command(client, message):
-    if len(message.command) < 2: return await message.reply_text("⚠️ **ব্যবহার:** `/del <মুভির নাম>`")
+    if len(message.command) < 2: return await reply(message, "⚠️ **ব্যবহার:** `/del <মুভির নাম>`")
     query = message.text.split(None, 1)[1].strip()
-    search_regex = re.compile('.*'.join(query.split()), re.IGNORECASE)
-    results = await movie_info_db.find({'title_lower': search_regex}).to_list(length=20)
-    if not results: return await message.reply_text(f"❌ `'{query}'` নামে কোনো মুভি খুঁজে পাওয়া যায়নি।")
+    results, _ = await search_movies(query, page_size=20)
+    if not results: return await reply(message, f"❌ `'{query}'` নামে কোনো মুভি খুঁজে পাওয়া যায়নি।")
     buttons = [[InlineKeyboardButton(f"🗑️ {movie['title']} {f'({movie['year']})' if movie.get('year') else ''}", callback_data=f"confirmdel_{movie['_id']}")] for movie in results]
     buttons.append([InlineKeyboardButton("🚫 বাতিল করুন", callback_data="cancel_delete")])
-    await message.reply_text("❓ আপনি নিচের কোনটি ডিলিট করতে চান? নির্বাচন করুন:", reply_markup=InlineKeyboardMarkup(buttons), quote=True)
+    await reply(message, "❓ আপনি নিচের কোনটি ডিলিট করতে চান? নির্বাচন করুন:", reply_markup=InlineKeyboardMarkup(buttons), quote=True)
 
 @app.on_message(filters.command("delall") & admin_filter)
 async def delete_all_command(client, message):
-    if await movie_info_db.count_documents({}) == 0: return await message.reply_text("✅ ডাটাবেস আগে থেকেই খালি আছে।")
+    if await movie_info_db.estimated_document_count() == 0: return await reply(message, "✅ ডাটাবেস আগে থেকেই খালি আছে।")
     markup = InlineKeyboardMarkup([[InlineKeyboardButton("✅ হ্যাঁ, আমি নিশ্চিত", callback_data="delall_confirm_yes")], [InlineKeyboardButton("🚫 না, থাক", callback_data="cancel_delete")]])
-    await message.reply_text(f"🗑️ **সতর্কবার্তা!**\n\nআপনি কি ডাটাবেস থেকে সমস্ত মুভি এবং তাদের ফাইল স্থায়ীভাবে মুছে ফেলতে চান?\n\n**এই কাজটি আর ফেরানো যাবে না।**", reply_markup=markup, quote=True)
+    await reply(message, f"🗑️ **সতর্কবার্তা!**\n\nআপনি কি ডাটাবেস থেকে সমস্ত মুভি এবং তাদের ফাইল স্থায়ীভাবে মুছে ফেলতে চান?\n\n**এই কাজটি আর ফেরানো যাবে না।**", reply_markup=markup, quote=True)
 
 # ========= 🤖 স্টার্ট এবং কলব্যাক হ্যান্ডলার ========= #
 @app.on_message(filters.private & filters.command("start"))
 async def start_handler(client, message):
     user_id = message.from_user.id
-    await users_db.update_one({"_id": user_id}, {"$set": {"name": message.from_user.first_name}}, upsert=True)
+    if user_cache.get(user_id) != message.from_user.first_name:
+        await users_db.update_one({"_id": user_id}, {"$set": {"name": message.from_user.first_name}}, upsert=True)
+        user_cache.set(user_id, message.from_user.first_name)
     if len(message.command) > 1:
         try:
             decoded_data = base64.urlsafe_b64decode(message.command[1]).decode()
             action, data_id, verified_user_id_str = decoded_data.split('_')
-            if user_id != int(verified_user_id_str): return await message.reply_text("😡 এই লিঙ্কটি আপনার জন্য নয়।")
+            if user_id != int(verified_user_id_str): return await reply(message, "😡 এই লিঙ্কটি আপনার জন্য নয়।")
             if action == "file":
-                file_doc = await files_db.find_one({"_id": ObjectId(data_id)})
-                if file_doc:
-                    movie_doc = await movie_info_db.find_one({"_id": file_doc['movie_id']})
-                    final_caption = (f"🎬 **{movie_doc['title']} {f'({movie_doc['year']})' if movie_doc.get('year') else ''}**\n"
-                                     f"✨ **Quality:** {file_doc['quality']}\n🌐 **Language:** {file_doc['language']}\n\n"
-                                     f"🙏 Thank you for using our bot!")
-                    movie_msg = await client.copy_message(user_id, file_doc['chat_id'], file_doc['msg_id'], caption=final_caption)
-                    warning_msg = await message.reply_text(f"❗ ফাইলটি **{DELETE_DELAY // 60} মিনিট** পর অটো-ডিলিট হয়ে যাবে।", quote=True)
-                    asyncio.create_task(delete_messages_after_delay([movie_msg, warning_msg], DELETE_DELAY))
-        except Exception as e: LOGGER.error(f"Deep link error: {e}"); await message.reply_text("🤔 লিঙ্কটি সম্ভবত inválid বা মেয়াদোত্তীর্ণ।")
+                with metrics.timer("bot_handler_seconds", handler="deeplink"):
+                    file_doc, movie_doc = await get_file_with_movie(ObjectId(data_id))
+                    if file_doc and movie_doc:
+                        final_caption = (f"🎬 **{movie_doc['title']} {f'({movie_doc['year']})' if movie_doc.get('year') else ''}**\n"
+                                         f"{f'📺 **Episode:** {file_doc['episode']}\n' if file_doc.get('episode') else ''}"
+                                         f"✨ **Quality:** {file_doc['quality']}\n🌐 **Language:** {file_doc['language']}\n\n"
+                                         f"🙏 Thank you for using our bot!")
+                        movie_msg = await send_queue.send(user_id, client.copy_message, user_id, file_doc['chat_id'], file_doc['msg_id'], caption=final_caption)
+                        warning_msg = await reply(message, f"❗ ফাইলটি **{DELETE_DELAY // 60} মিনিট** পর অটো-ডিলিট হয়ে যাবে।", quote=True)
+                        delete_scheduler.schedule([movie_msg, warning_msg], DELETE_DELAY)
+        except Exception as e: LOGGER.error(f"Deep link error: {e}"); await reply(message, "🤔 লিঙ্কটি সম্ভবত inválid বা মেয়াদোত্তীর্ণ।")
     else:
-        reply_msg = await message.reply_text(f"👋 Hello, **{message.from_user.first_name}**!\nSend me a movie or series name to search.")
-        asyncio.create_task(delete_messages_after_delay([message, reply_msg], 120))
+        reply_msg = await reply(message, f"👋 Hello, **{message.from_user.first_name}**!\nSend me a movie or series name to search.")
+        delete_scheduler.schedule([message, reply_msg], 120)
 
-def build_search_results_markup(results, query, current_page, total_count, add_request_button=False):
+def build_search_results_markup(results, session, current_page, add_request_button=False):
     buttons = [[InlineKeyboardButton(f"🎬 {movie['title']} {f'({movie['year']})' if movie.get('year') else ''}", callback_data=f"showqual_{movie['_id']}")] for movie in results]
+    total_count = len(session['ids'])
     if total_count > SEARCH_PAGE_SIZE:
         nav_buttons, total_pages = [], math.ceil(total_count / SEARCH_PAGE_SIZE)
-        if current_page > 0: nav_buttons.append(InlineKeyboardButton("⬅️ আগের পাতা", callback_data=f"nav_{current_page-1}_{query}"))
+        if current_page > 0: nav_buttons.append(InlineKeyboardButton("⬅️ আগের পাতা", callback_data=f"nav_{session['token']}_{current_page-1}"))
         nav_buttons.append(InlineKeyboardButton(f"📄 {current_page+1}/{total_pages} 📄", callback_data="noop"))
-        if (current_page + 1) * SEARCH_PAGE_SIZE < total_count: nav_buttons.append(InlineKeyboardButton("পরের পাতা ➡️", callback_data=f"nav_{current_page+1}_{query}"))
+        if (current_page + 1) * SEARCH_PAGE_SIZE < total_count: nav_buttons.append(InlineKeyboardButton("পরের পাতা ➡️", callback_data=f"nav_{session['token']}_{current_page+1}"))
         buttons.append(nav_buttons)
-    if add_request_button: buttons.append([InlineKeyboardButton(f"🙏 '{query[:20]}' এর জন্য অনুরোধ করুন", callback_data=f"reqmovie_{query}")])
+    if add_request_button: buttons.append(build_request_button(session))
     return InlineKeyboardMarkup(buttons)
 
+def build_request_button(session):
+    return [InlineKeyboardButton(f"🙏 '{session['query'][:20]}' এর জন্য অনুরোধ করুন", callback_data=f"reqmovie_{session['token']}")]
+
 @app.on_callback_query()
 async def callback_handler(client, callback_query):
     data, user_id = callback_query.data, callback_query.from_user.id
     if data == "noop": await callback_query.answer(); return
-    if data == "cancel_delete": await callback_query.message.edit_text("🚫 ডিলিট অপারেশন বাতিল করা হয়েছে।"); await callback_query.answer(); return
+    if data == "cancel_delete": await edit(callback_query.message, "🚫 ডিলিট অপারেশন বাতিল করা হয়েছে।"); await callback_query.answer(); return
 
     action = data.split("_", 1)[0]
     
     if action == "showqual":
         movie_id = ObjectId(data.split("_", 1)[1])
-        new_msg = await show_quality_options(callback_query.message, movie_id, is_edit=True, return_message=True)
-        if new_msg: asyncio.create_task(delete_messages_after_delay([new_msg], DELETE_DELAY))
+        with metrics.timer("bot_handler_seconds", handler="showqual"):
+            new_msg = await show_quality_options(callback_query.message, movie_id, is_edit=True, return_message=True)
+        if new_msg: delete_scheduler.schedule([new_msg], DELETE_DELAY)
     elif action == "getfile":
         file_id_str = data.split("_", 1)[1]
         encoded_data = base64.urlsafe_b64encode(f'file_{file_id_str}_{user_id}'.encode()).decode()
-        await callback_query.message.edit_reply_markup(InlineKeyboardMarkup([[InlineKeyboardButton("✅ ভেরিফাই করে ডাউনলোড করুন", url=f"{AD_PAGE_URL}?data={encoded_data}")]]))
+        await send_queue.send(callback_query.message.chat.id, callback_query.message.edit_reply_markup, InlineKeyboardMarkup([[InlineKeyboardButton("✅ ভেরিফাই করে ডাউনলোড করুন", url=f"{AD_PAGE_URL}?data={encoded_data}")]]))
     elif action == "nav":
         try:
-            _, page_str, query = data.split("_", 2)
-            current_page, search_regex = int(page_str), re.compile('.*'.join(query.split()), re.IGNORECASE)
-            total_count = await movie_info_db.count_documents({'title_lower': search_regex})
-            results = await movie_info_db.find({'title_lower': search_regex}).skip(current_page * SEARCH_PAGE_SIZE).limit(SEARCH_PAGE_SIZE).to_list(length=SEARCH_PAGE_SIZE)
-            if results: await callback_query.message.edit_text("🤔 আপনি কি এগুলোর মধ্যে কোনো একটি খুঁজছেন?", reply_markup=build_search_results_markup(results, query, current_page, total_count, True))
+            _, token, page_str = data.split("_", 2)
+            session, current_page = search_sessions.get(token), int(page_str)
+            if not session: return await callback_query.answer("⌛ এই সার্চের মেয়াদ শেষ হয়ে গেছে। আবার সার্চ করুন।", show_alert=True)
+            with metrics.timer("bot_handler_seconds", handler="nav"):
+                results = await get_movies(session['ids'][current_page * SEARCH_PAGE_SIZE:(current_page + 1) * SEARCH_PAGE_SIZE])
+                if results: await edit(callback_query.message, "🤔 আপনি কি এগুলোর মধ্যে কোনো একটি খুঁজছেন?", reply_markup=build_search_results_markup(results, session, current_page, True))
         except MessageNotModified: pass
         except Exception as e: LOGGER.error(f"Navigation callback error: {e}"); await callback_query.answer("কিছু একটা সমস্যা হয়েছে।", show_alert=True)
     elif action == "reqmovie":
-        query, user = data.split("_", 1)[1], callback_query.from_user
+        session, user = search_sessions.get(data.split("_", 1)[1]), callback_query.from_user
+        if not session: return await callback_query.answer("⌛ এই সার্চের মেয়াদ শেষ হয়ে গেছে। আবার সার্চ করে অনুরোধ করুন।", show_alert=True)
+        query = session['query']
         admin_message = f"🙏 **নতুন মুভির অনুরোধ**\n\n👤 **ব্যবহারকারী:** {user.mention} (`{user.id}`)\n🎬 **অনুসন্ধান:** `{query}`"
         try:
-            await client.send_message(LOG_CHANNEL_ID, admin_message, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("✍️ ইউজারকে রিপ্লাই দিন", callback_data=f"replyuser_{user.id}")]]))
-            await callback_query.message.edit_text("✅ আপনার অনুরোধটি অ্যাডমিনদের কাছে পাঠানো হয়েছে।")
+            await send_queue.send(LOG_CHANNEL_ID, client.send_message, LOG_CHANNEL_ID, admin_message, reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("✍️ ইউজারকে রিপ্লাই দিন", callback_data=f"replyuser_{user.id}")]]))
+            await edit(callback_query.message, "✅ আপনার অনুরোধটি অ্যাডমিনদের কাছে পাঠানো হয়েছে।")
             LOGGER.info(f"Movie request for '{query}' from user {user.id} has been forwarded.")
         except Exception as e: LOGGER.error(f"Failed to send request to log channel: {e}"); await callback_query.answer("❌ অ্যাডমিনদের কাছে অনুরোধ পাঠাতে ব্যর্থ।", show_alert=True)
     elif action == "replyuser":
         if user_id not in ADMIN_IDS: return await callback_query.answer("❌ এটি শুধুমাত্র অ্যাডমিনদের জন্য।", show_alert=True)
         target_user_id = data.split("_", 1)[1]
-        await client.send_message(callback_query.message.chat.id, f"✍️ **ব্যবহারকারীকে রিপ্লাই দিন**\n\nUser ID: `{target_user_id}`\n\nএই ব্যবহারকারীকে উত্তর দিতে আপনার মেসেজটি এখানে পাঠান।", reply_markup=ForceReply(selective=True, placeholder=f"reply_to_{target_user_id}"))
+        await send_queue.send(callback_query.message.chat.id, client.send_message, callback_query.message.chat.id, f"✍️ **ব্যবহারকারীকে রিপ্লাই দিন**\n\nUser ID: `{target_user_id}`\n\nএই ব্যবহারকারীকে উত্তর দিতে আপনার মেসেজটি এখানে পাঠান।", reply_markup=ForceReply(selective=True, placeholder=f"reply_to_{target_user_id}"))
         try: await callback_query.message.delete()
         except: pass
     elif action == "confirmdel":
         if user_id not in ADMIN_IDS: return await callback_query.answer("❌ এটি শুধুমাত্র অ্যাডমিনদের জন্য।", show_alert=True)
         movie_id = ObjectId(data.split("_", 1)[1])
         movie_doc = await movie_info_db.find_one_and_delete({"_id": movie_id})
-        if not movie_doc: return await callback_query.message.edit_text("❌ এই মুভিটি ইতোমধ্যে ডিলিট করা হয়ে গেছে।")
+        if not movie_doc: return await edit(callback_query.message, "❌ এই মুভিটি ইতোমধ্যে ডিলিট করা হয়ে গেছে।")
         files_deleted = await files_db.delete_many({"movie_id": movie_id})
+        suggestion_index.remove(movie_id)
+        invalidate_movie(movie_id)
         LOGGER.info(f"ADMIN DELETE: User {user_id} deleted movie '{movie_doc['title']}'. {files_deleted.deleted_count} files removed.")
-        await callback_query.message.edit_text(f"✅ **'*{movie_doc['title']}*'** এবং এর সাথে যুক্ত সমস্ত ফাইল সফলভাবে ডিলিট করা হয়েছে।")
+        await edit(callback_query.message, f"✅ **'*{movie_doc['title']}*'** এবং এর সাথে যুক্ত সমস্ত ফাইল সফলভাবে ডিলিট করা হয়েছে।")
     elif data == "delall_confirm_yes":
         if user_id not in ADMIN_IDS: return await callback_query.answer("❌ এটি শুধুমাত্র অ্যাডমিনদের জন্য।", show_alert=True)
-        await callback_query.message.edit_text("⏳ সব মুভি এবং ফাইল ডিলিট করা হচ্ছে...")
+        await edit(callback_query.message, "⏳ সব মুভি এবং ফাইল ডিলিট করা হচ্ছে...")
         movies_deleted, files_deleted = await movie_info_db.delete_many({}), await files_db.delete_many({})
+        suggestion_index.clear()
+        for cache in (movie_cache, files_cache, file_cache, search_cache): cache.clear()
         LOGGER.warning(f"CRITICAL: User {user_id} deleted ALL data. {movies_deleted.deleted_count} movies, {files_deleted.deleted_count} files removed.")
-        await callback_query.message.edit_text(f"✅ **সম্পন্ন!**\n\n- মোট মুভি ডিলিট: `{movies_deleted.deleted_count}`\n- মোট ফাইল ডিলিট: `{files_deleted.deleted_count}`")
+        await edit(callback_query.message, f"✅ **সম্পন্ন!**\n\n- মোট মুভি ডিলিট: `{movies_deleted.deleted_count}`\n- মোট ফাইল ডিলিট: `{files_deleted.deleted_count}`")
     
     await callback_query.answer()
 
 async def show_quality_options(message, movie_id, is_edit=False, return_message=False):
     try:
-        files = await files_db.find({"movie_id": movie_id}).sort("quality").to_list(length=None)
-        movie = await movie_info_db.find_one({"_id": movie_id})
+        files, movie = await asyncio.gather(get_movie_files(movie_id), get_movie(movie_id))
         if not movie: text = "দুঃখিত, মুভির বিস্তারিত তথ্য পাওয়া যায়নি।"
         elif not files: text = "দুঃখিত, এই মুভির জন্য কোনো ফাইল পাওয়া যায়নি।"
         else:
             text = f"🎬 **{movie['title']} {f'({movie['year']})' if movie.get('year') else ''}**\n\n👇 আপনার পছন্দের কোয়ালিটি বেছে নিন:"
-            buttons = [[InlineKeyboardButton(f"✨ {f['quality']} | 🌐 {f['language']}", callback_data=f"getfile_{f['_id']}")] for f in files]
+            buttons = [[InlineKeyboardButton(f"{f'📺 {f['episode']} | ' if f.get('episode') else ''}✨ {f['quality']} | 🌐 {f['language']}", callback_data=f"getfile_{f['_id']}")] for f in files]
             markup = InlineKeyboardMarkup(buttons)
-            reply_msg = await message.edit_text(text, reply_markup=markup) if is_edit else await message.reply_text(text, reply_markup=markup, quote=True)
+            reply_msg = await edit(message, text, reply_markup=markup) if is_edit else await reply(message, text, reply_markup=markup, quote=True)
             return reply_msg if return_message else None
         
-        reply_msg = await message.edit_text(text) if is_edit else await message.reply_text(text, quote=True)
+        reply_msg = await edit(message, text) if is_edit else await reply(message, text, quote=True)
         return reply_msg if return_message else None
     except MessageNotModified: return message if return_message else None
     except Exception as e: LOGGER.error(f"Show quality options error: {e}"); return None
 
 async def find_suggestions(query, threshold=75, limit=3):
-    try:
-        all_movies = await movie_info_db.find({}, {"title": 1, "year": 1, "_id": 1}).to_list(length=None)
-        if not all_movies: return []
-        choices_map = {f"{doc['title']} ({doc.get('year', 'N/A')})": doc['_id'] for doc in all_movies}
-        best_matches = process.extract(query, choices_map.keys(), limit=limit)
-        return [{"title": movie['title'], "year": movie.get('year'), "_id": choices_map[title_year]} for title_year, score in best_matches if score >= threshold for movie in all_movies if movie['_id'] == choices_map[title_year]]
+    try: return suggestion_index.search(query, threshold=threshold, limit=limit)
     except Exception as e: LOGGER.error(f"Error finding suggestions: {e}"); return []
 
 # ========= 🔎 চূড়ান্ত Regex সার্চ হ্যান্ডলার ========= #
 @app.on_message((filters.private | filters.group) & filters.text)
+@timed("search")
 async def reliable_search_handler(client, message):
     if message.text and message.text.startswith('/'): return
     if message.from_user and message.from_user.is_bot: return
 
     query = message.text.strip()
-    cleaned_query = ' '.join(re.findall(r'\b[a-zA-Z0-9]+\b', query.lower()))
+    cleaned_query = ' '.join(tokenize(query))
     if not cleaned_query: return
+    if user_search_limiter.consume(message.from_user.id if message.from_user else message.chat.id) or \
+       (message.chat.type != ChatType.PRIVATE and chat_search_limiter.consume(message.chat.id)):
+        return delete_scheduler.schedule([message], DELETE_DELAY)
     
-    search_regex = re.compile('.*'.join(cleaned_query.split()), re.IGNORECASE)
     messages_to_delete, reply_msg = [message], None
 
     try:
-        total_count = await movie_info_db.count_documents({'title_lower': search_regex})
+        results, ids = await search_movies(cleaned_query)
+        total_count = len(ids)
         LOGGER.info(f"Search for '{cleaned_query}' in chat {message.chat.id} ({message.chat.type.name}) found {total_count} results.")
         
         if total_count == 0:
@@ -275,38 +995,108 @@ async def reliable_search_handler(client, message):
                 suggestions = await find_suggestions(cleaned_query)
                 if suggestions:
                     buttons = [[InlineKeyboardButton(f"🤔 {movie['title']} ({movie.get('year', '')})", callback_data=f"showqual_{movie['_id']}")] for movie in suggestions]
-                    buttons.append([InlineKeyboardButton(f"🙏 '{query[:20]}' এর জন্য অনুরোধ করুন", callback_data=f"reqmovie_{query}")])
-                    reply_msg = await message.reply_text("❌ আপনার সার্চের সাথে সরাসরি কোনো মুভি মেলেনি।\n\n**আপনি কি নিচের মুভিগুলোর কোনো একটি খুঁজছিলেন?**\n\nযদি আপনার কাঙ্ক্ষিত মুভি এখানে না থাকে, তাহলে অনুরোধ বাটনে ক্লিক করুন।", reply_markup=InlineKeyboardMarkup(buttons), quote=True)
+                    buttons.append(build_request_button(create_search_session(query, ids)))
+                    reply_msg = await reply(message, "❌ আপনার সার্চের সাথে সরাসরি কোনো মুভি মেলেনি।\n\n**আপনি কি নিচের মুভিগুলোর কোনো একটি খুঁজছিলেন?**\n\nযদি আপনার কাঙ্ক্ষিত মুভি এখানে না থাকে, তাহলে অনুরোধ বাটনে ক্লিক করুন।", reply_markup=InlineKeyboardMarkup(buttons), quote=True)
                 else:
-                    markup = InlineKeyboardMarkup([[InlineKeyboardButton(f"🙏 '{query[:20]}' এর জন্য অনুরোধ করুন", callback_data=f"reqmovie_{query}")]])
-                    reply_msg = await message.reply_text("❌ **মুভিটি খুঁজে পাওয়া যায়নি!**\n\nআপনি চাইলে নিচের বাটনে ক্লিক করে মুভিটির জন্য অ্যাডমিনদের কাছে অনুরোধ করতে পারেন।", reply_markup=markup, quote=True)
+                    markup = InlineKeyboardMarkup([build_request_button(create_search_session(query, ids))])
+                    reply_msg = await reply(message, "❌ **মুভিটি খুঁজে পাওয়া যায়নি!**\n\nআপনি চাইলে নিচের বাটনে ক্লিক করে মুভিটির জন্য অ্যাডমিনদের কাছে অনুরোধ করতে পারেন।", reply_markup=markup, quote=True)
                 if reply_msg: messages_to_delete.append(reply_msg)
         elif total_count == 1:
-            movie = await movie_info_db.find_one({'title_lower': search_regex})
-            reply_msg = await show_quality_options(message, movie['_id'], return_message=True)
+            reply_msg = await show_quality_options(message, results[0]['_id'], return_message=True)
             if reply_msg: messages_to_delete.append(reply_msg)
         else:
-            results = await movie_info_db.find({'title_lower': search_regex}).limit(SEARCH_PAGE_SIZE).to_list(length=SEARCH_PAGE_SIZE)
-            markup = build_search_results_markup(results, cleaned_query, 0, total_count, add_request_button=True)
-            reply_msg = await message.reply_text("🤔 আপনি কি এগুলোর মধ্যে কোনো একটি খুঁজছেন? যদি আপনার কাঙ্ক্ষিত মুভিটি এখানে না থাকে, তাহলে নিচের অনুরোধ বাটনে ক্লিক করুন।", reply_markup=markup, quote=True)
+            markup = build_search_results_markup(results, create_search_session(query, ids), 0, add_request_button=True)
+            reply_msg = await reply(message, "🤔 আপনি কি এগুলোর মধ্যে কোনো একটি খুঁজছেন? যদি আপনার কাঙ্ক্ষিত মুভিটি এখানে না থাকে, তাহলে নিচের অনুরোধ বাটনে ক্লিক করুন।", reply_markup=markup, quote=True)
             messages_to_delete.append(reply_msg)
     except Exception as e:
         LOGGER.error(f"Database search error: {e}")
         if message.chat.type == ChatType.PRIVATE:
-            reply_msg = await message.reply_text("⚠️ বট একটি ডাটাবেস সমস্যার সম্মুখীন হয়েছে।")
+            reply_msg = await reply(message, "⚠️ বট একটি ডাটাবেস সমস্যার সম্মুখীন হয়েছে।")
             messages_to_delete.append(reply_msg)
     finally:
-        if messages_to_delete: asyncio.create_task(delete_messages_after_delay(messages_to_delete, DELETE_DELAY))
+        if messages_to_delete: delete_scheduler.schedule(messages_to_delete, DELETE_DELAY)
 
-# ========= ▶️ বট এবং ওয়েব সার্ভার চালু করা ========= #
-def run_web_server():
-    web_app.run(host='0.0.0.0', port=PORT)
+# ========= 📈 মেট্রিক্স ও প্রোফাইলিং এন্ডপয়েন্ট ========= #
+def register_metric_collectors():
+    metrics.collect("bot_cache_entries", "gauge", "Entries held by each cache.", lambda: {(("cache", cache.name),): len(cache.data) for cache in CACHES})
+    metrics.collect("bot_cache_hits_total", "counter", "Cache hits.", lambda: {(("cache", cache.name),): cache.hits for cache in CACHES})
+    metrics.collect("bot_cache_misses_total", "counter", "Cache misses.", lambda: {(("cache", cache.name),): cache.misses for cache in CACHES})
+    metrics.collect("bot_search_sessions", "gauge", "Live search sessions.", lambda: len(search_sessions.data))
+    metrics.collect("bot_suggestion_index_titles", "gauge", "Titles in the suggestion index.", lambda: len(suggestion_index.entries))
+    metrics.collect("bot_search_coalesced_total", "counter", "Searches that joined an in-flight lookup.", lambda: search_flight.coalesced)
+    metrics.collect("bot_search_throttled_total", "counter", "Searches dropped by rate limiting.", lambda: {(("scope", "user"),): user_search_limiter.throttled, (("scope", "chat"),): chat_search_limiter.throttled})
+    metrics.collect("bot_delete_scheduler_pending", "gauge", "Message groups waiting for auto-delete.", lambda: len(delete_scheduler.heap))
+    metrics.collect("bot_index_writer_pending", "gauge", "Parsed files waiting for the next index batch.", lambda: len(index_writer.pending))
+    metrics.collect("bot_index_files_written_total", "counter", "File upserts written by the indexer.", lambda: index_writer.written)
+    metrics.collect("bot_send_queue_pending", "gauge", "Outbound requests waiting in the send queue.", lambda: len(send_queue))
+    metrics.collect("bot_send_queue_sent_total", "counter", "Outbound requests completed.", lambda: {(("priority", "interactive"),): send_queue.sent[SendQueue.INTERACTIVE], (("priority", "bulk"),): send_queue.sent[SendQueue.BULK]})
+    metrics.collect("bot_send_queue_flood_waits_total", "counter", "FloodWait errors returned by Telegram.", lambda: send_queue.flood_waits)
+    metrics.collect("bot_send_queue_failed_total", "counter", "Outbound requests that finally failed.", lambda: send_queue.failed)
+    metrics.collect("bot_asyncio_tasks", "gauge", "Tasks alive on the event loop.", lambda: len(asyncio.all_tasks()))
 
-if __name__ == "__main__":
-    LOGGER.info("Starting web server on a separate thread...")
-    web_thread = Thread(target=run_web_server)
-    web_thread.start()
-    
+async def monitor_event_loop_lag(interval=1.0):
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        metrics.set_gauge("bot_event_loop_lag_seconds", max(0.0, time.perf_counter() - started - interval))
+
+def sample_stacks(thread_id, seconds, interval=0.005):
+    """নির্দিষ্ট থ্রেডের স্ট্যাক নমুনা নেয় এবং flamegraph-উপযোগী collapsed ফরম্যাটে ফেরত দেয়।"""
+    samples, deadline = Counter(), time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame, stack = sys._current_frames().get(thread_id), []
+        while frame:
+            stack.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_firstlineno})")
+            frame = frame.f_back
+        if stack: samples[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "\n".join(f"{stack} {count}" for stack, count in samples.most_common()) + "\n"
+
+async def handle_http(reader, writer):
+    try:
+        request_line = (await asyncio.wait_for(reader.readline(), 10)).decode(errors="ignore").split()
+        while (await asyncio.wait_for(reader.readline(), 10)) not in (b"\r\n", b"\n", b""): pass
+        route, _, query = (request_line[1] if len(request_line) > 1 else "/").partition("?")
+        status, content_type = "200 OK", "text/plain; charset=utf-8"
+        if route == "/": body = "Bot is alive and running!"
+        elif route == "/metrics": body, content_type = metrics.render(), "text/plain; version=0.0.4; charset=utf-8"
+        elif route == "/debug/profile" and PROFILER_ENABLED:
+            params = dict(pair.partition("=")[::2] for pair in query.split("&") if pair)
+            try: seconds = float(params.get("seconds", 10))
+            except ValueError: seconds = math.nan
+            if not math.isfinite(seconds): status, body = "400 Bad Request", "seconds must be a number"
+            else: body = await asyncio.get_running_loop().run_in_executor(None, sample_stacks, threading.get_ident(), min(max(seconds, 0.1), 60))
+        else: status, body = "404 Not Found", "Not Found"
+        payload = body.encode()
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+        await writer.drain()
+    except Exception as e: LOGGER.debug(f"HTTP request failed: {e}")
+    finally: writer.close()
+
+async def start_web_server():
+    register_metric_collectors()
+    asyncio.create_task(monitor_event_loop_lag())
+    server = await asyncio.start_server(handle_http, "0.0.0.0", PORT)
+    LOGGER.info(f"📈 Health and metrics endpoint listening on port {PORT}{' (profiler enabled)' if PROFILER_ENABLED else ''}.")
+    return server
+
+# ========= ▶️ বট এবং ওয়েব সার্ভার চালু করা ========= #
+async def main():
+    web_server = await start_web_server()
+    await ensure_indexes()
+    await ensure_title_tokens()
+    await suggestion_index.build()
+    send_queue.start()
+    await app.start()
+    await delete_scheduler.start()
     LOGGER.info("The Don is waking up... (v5.1 - Reliable Admin Reply)")
-    app.run()
+    await idle()
+    await index_writer.flush()
+    await delete_scheduler.stop()
+    await send_queue.stop()
+    await app.stop()
+    web_server.close()
+
+if __name__ == "__main__":
+    app.run(main())
     LOGGER.info("The Don is resting...")
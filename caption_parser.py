@@ -0,0 +1,116 @@
+"""Single-pass caption parser for posts in the file channel.
+
+Every keyword rule is folded into one precompiled alternation, so a caption is lowercased
+once and scanned once with finditer(); each hit is dispatched on the name of the group
+that matched. parse_caption() returns a plain dict, parse_captions() handles batches.
+
+    >>> parse_caption("Breaking.Bad.S01E05.720p.WEB-DL.Hindi.English.x265")
+    {'title': 'Breaking Bad', 'year': None, 'quality': '720p', 'languages': ['Hindi', 'English'], 'season': 1, 'episode': 5, 'codec': 'HEVC', 'size': None}
+"""
+
+import os
+import re
+
+QUALITIES = {"360p": "360p", "480p": "480p", "576p": "576p", "720p": "720p", "1080p": "1080p", "1440p": "1440p", "2160p": "2160p", "4k": "4k", "uhd": "4k"}
+LANGUAGES = {"hindi": "Hindi", "bangla": "Bangla", "bengali": "Bangla", "english": "English", "tamil": "Tamil", "telugu": "Telugu",
+             "malayalam": "Malayalam", "kannada": "Kannada", "marathi": "Marathi", "punjabi": "Punjabi", "urdu": "Urdu",
+             "korean": "Korean", "japanese": "Japanese", "chinese": "Chinese", "spanish": "Spanish", "french": "French"}
+CODECS = {"x264": "H.264", "h264": "H.264", "h 264": "H.264", "avc": "H.264", "x265": "HEVC", "h265": "HEVC", "h 265": "HEVC",
+          "hevc": "HEVC", "av1": "AV1", "xvid": "XviD"}
+VIDEO_EXTENSIONS = {".mkv", ".mp4", ".avi", ".mov", ".m4v", ".webm", ".wmv", ".flv", ".ts", ".3gp", ".mpg", ".mpeg", ".zip", ".rar"}
+SOURCES = ["web-dl", "webdl", "webrip", "web", "bluray", "blu-ray", "brrip", "bdrip", "hdrip", "dvdrip", "dvdscr", "hdtv", "hdcam", "camrip",
+           "predvd", "hdts", "dual audio", "multi audio", "esub", "esubs", "hc-esub", "10bit", "hdr", "amzn", "nf"]
+# টাইটেলেও থাকতে পারে ("Charlotte's Web"), তাই সাল/কোয়ালিটি/কোডেক/এপিসোডের পরে এলেই কেবল মার্কার ধরা হয়।
+AMBIGUOUS_SOURCES = {"web", "nf", "hdr"}
+
+def _words(words):
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+# একটিমাত্র কম্পাইল করা প্যাটার্ন; গ্রুপের নাম দেখে প্রতিটি ম্যাচ কোন ধরনের তা বোঝা যায়।
+TOKEN_PATTERN = re.compile(rf"""
+    (?P<episode_tag>\bs(?P<season>\d{{1,2}})\s?[ex](?P<episode>\d{{1,3}})\b
+        | \bseason\s?(?P<season_word>\d{{1,2}})(?:\s?(?:episode|ep)\s?(?P<episode_word>\d{{1,3}}))?\b
+        | \bs(?P<season_only>\d{{1,2}})\b)
+  | (?P<bracket_year>[\(\[](?:19|20)\d{{2}}[\)\]])
+  | (?P<year>\b(?:19|20)\d{{2}}\b)
+  | (?P<quality>\b(?:{_words(QUALITIES)})\b)
+  | (?P<codec>\b(?:{_words(CODECS)})\b)
+  | (?P<size>\b\d+(?:\.\d+)?\s?(?:gb|mb)\b)
+  | (?P<source>\b(?:{_words(SOURCES)})\b)
+  | (?P<language>\b(?:{_words(LANGUAGES)})\b)
+""", re.VERBOSE)
+# "." আর "_" শব্দ আলাদা করে, তবে দুই অঙ্কের মাঝের "." (1.4GB) থেকে যায়; এক অক্ষরের বদলে এক অক্ষর, তাই অবস্থান মেলে।
+SEPARATORS = re.compile(r"_|(?<!\d)\.|\.(?!\d)")
+EDGE_JUNK = re.compile(r"^[\W_]+|[\s\-–—:|(\[{]+$")
+SPACES = re.compile(r"\s+")
+JOINERS = re.compile(r"[\s,+&/|\-]*")
+DECORATION_LINES = re.compile(r"^(?:[^\w\n]*\n)+")  # "⭐⭐⭐\n", "━━━━\n" ইত্যাদি টাইটেলের আগের সাজসজ্জা
+
+
+def _clean_title(text):
+    if " " not in text.strip(): text = text.replace(".", " ").replace("_", " ")  # file name style: Movie.Name.2020
+    return EDGE_JUNK.sub("", SPACES.sub(" ", text)).strip()
+
+def parse_caption(caption, file_name=None):
+    """Extract title, year, quality, all languages, season/episode, codec and size in one scan.
+
+    The file name is used when the caption is empty or yields no title; it also fills fields the caption left blank.
+    """
+    result = _parse_text(DECORATION_LINES.sub("", caption.strip())) if caption and caption.strip() else None
+    if result and result['title'] or not (file_name and file_name.strip()): return result or _parse_text("")
+    root, extension = os.path.splitext(file_name.strip())
+    fallback = _parse_text(root if extension.lower() in VIDEO_EXTENSIONS else file_name.strip())
+    if result: fallback.update({key: value for key, value in result.items() if value})
+    return fallback
+
+def _parse_text(text):
+    lowered = text.lower()
+    if len(lowered) != len(text): lowered = "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+    lowered = SEPARATORS.sub(" ", lowered)
+    first_line_end = text.find("\n") if "\n" in text else len(text)
+
+    result = {"title": None, "year": None, "quality": None, "languages": [], "season": None, "episode": None, "codec": None, "size": None}
+    bracket_years, bare_years, marker_start, languages, anchored = [], [], None, [], False
+    for match in TOKEN_PATTERN.finditer(lowered):
+        kind, value, start = match.lastgroup, match.group(), match.start()
+        if kind == "source" and value in AMBIGUOUS_SOURCES and not anchored: continue
+        anchored = anchored or kind in ("bracket_year", "year", "quality", "codec", "episode_tag")
+        if kind == "bracket_year": bracket_years.append((start, value[1:-1], match.end()))
+        elif kind == "year": bare_years.append((start, value))
+        else:
+            if kind != "language" and (marker_start is None) and start < first_line_end: marker_start = start
+            if kind == "episode_tag" and result['season'] is None:
+                season = match.group("season") or match.group("season_word") or match.group("season_only")
+                episode = match.group("episode") or match.group("episode_word")
+                result['season'], result['episode'] = int(season), int(episode) if episode else None
+            elif kind == "quality" and result['quality'] is None: result['quality'] = QUALITIES[value]
+            elif kind == "codec" and result['codec'] is None: result['codec'] = CODECS[value]
+            elif kind == "size" and result['size'] is None: result['size'] = value.replace(" ", "").upper()
+            elif kind == "language": languages.append((start, match.end(), LANGUAGES[value]))
+
+    # মার্কারের ঠিক আগে বসা ভাষার শব্দগুলো ("Pathaan Hindi Tamil 720p") টাইটেলের অংশ নয়, অডিও ভাষা।
+    if marker_start is not None:
+        for start, end, _ in reversed([language for language in languages if language[1] <= marker_start]):
+            if not JOINERS.fullmatch(lowered, end, marker_start): break
+            marker_start = start
+
+    # বন্ধনীর ভেতরের সাল সবচেয়ে নির্ভরযোগ্য; নাহলে অন্য মার্কারের আগের শেষ সালটি (যেমন "Blade Runner 2049 2017")।
+    year_start = None
+    if bracket_years: year_start, result['year'], year_end = bracket_years[0]
+    else:
+        candidates = [(start, year) for start, year in bare_years if marker_start is None or start < marker_start] or bare_years[:1]
+        if candidates: year_start, result['year'] = candidates[-1]
+
+    title_stop = first_line_end if marker_start is None else marker_start
+    title_end = min(title_stop, first_line_end if year_start is None else year_start)
+    title = _clean_title(text[:title_end])
+    if not title and year_start is not None:
+        if bracket_years: title = _clean_title(text[year_end:title_stop])  # "[2019] Parasite 720p"
+        else: title, result['year'] = _clean_title(text[:title_stop]), None  # "1917 720p"
+    result['title'] = title or None
+    result['languages'] = list(dict.fromkeys(language for start, _, language in languages if start >= title_end))
+    return result
+
+def parse_captions(items):
+    """Batch form for backfills: items are captions or (caption, file_name) pairs."""
+    return [parse_caption(*item) if isinstance(item, tuple) else parse_caption(item) for item in items]
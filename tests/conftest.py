@@ -0,0 +1,43 @@
+import os
+import sys
+import asyncio
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# bot.py validates its configuration at import time; give it harmless offline values.
+for key, value in {"API_ID": "1", "API_HASH": "offline", "BOT_TOKEN": "1:offline", "MONGO_URL": "mongodb://127.0.0.1:1",
+                   "AD_PAGE_URL": "https://example.invalid", "ADMIN_IDS": "1", "LOG_CHANNEL_ID": "-1001"}.items():
+    os.environ.setdefault(key, value)
+
+
+@pytest.fixture
+def offline_bot(monkeypatch):
+    """Point bot.py at fresh fakes; returns (bot, database, client, run) where run() executes a coroutine with an unpaced send queue."""
+    import bot
+    from fakes import FakeDatabase, FakeClient
+    database, client = FakeDatabase(), FakeClient()
+    monkeypatch.setattr(bot, "app", client)
+    monkeypatch.setattr(bot, "db", database)
+    for name, collection in {"movie_info_db": "movie_info", "files_db": "files", "users_db": "users",
+                             "pending_deletes_db": "pending_deletes", "state_db": "bot_state"}.items():
+        monkeypatch.setattr(bot, name, database[collection])
+    for cache in [*bot.CACHES, bot.search_sessions]: cache.clear(); cache.hits = cache.misses = 0
+    monkeypatch.setattr(bot, "suggestion_index", bot.SuggestionIndex())
+    monkeypatch.setattr(bot, "search_flight", bot.SingleFlight())
+    monkeypatch.setattr(bot, "index_writer", bot.IndexWriter())
+    monkeypatch.setattr(bot, "delete_scheduler", bot.DeleteScheduler())
+    monkeypatch.setattr(bot, "user_search_limiter", bot.TokenBucket(1e9, 1e9))
+    monkeypatch.setattr(bot, "chat_search_limiter", bot.TokenBucket(1e9, 1e9))
+    monkeypatch.setattr(bot, "send_queue", bot.SendQueue(1e9, 1e9, 1e9, 16))
+
+    def run(coroutine):
+        async def with_send_queue():
+            bot.send_queue.start()
+            try: return await coroutine
+            finally: await bot.send_queue.stop()
+        return asyncio.run(with_send_queue())
+    return bot, database, client, run
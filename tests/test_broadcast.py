@@ -0,0 +1,79 @@
+"""/broadcast routing through pyrogram's dispatcher and the resumable broadcast runner."""
+
+import asyncio
+from types import SimpleNamespace
+
+from pyrogram.handlers import MessageHandler
+from pyrogram.types import ForceReply
+
+from fakes import FakeMessage
+
+ADMIN_ID = 1  # conftest sets ADMIN_IDS=1
+
+
+class RawUpdate:
+    def __init__(self, message):
+        self.message = message
+
+def admin_message(text, reply_to=None):
+    message = FakeMessage(ADMIN_ID, user_id=ADMIN_ID, text=text)
+    message.reply_to_message, message.reply_to_message_id = reply_to, reply_to.id if reply_to else None
+    return message
+
+def dispatch(bot, monkeypatch, message):
+    """Feed one message through the real Dispatcher.handler_worker; returns the name of the handler that ran."""
+    dispatcher = bot.app.dispatcher
+    dispatcher.loop.run_until_complete(asyncio.sleep(0))  # let the @app.on_message registrations land
+    monkeypatch.setattr(bot.app, "me", SimpleNamespace(username="moviebot"), raising=False)
+    ran = []
+    for group in dispatcher.groups.values():
+        for handler in group:
+            async def record(_, __, name=handler.callback.__name__): ran.append(name)
+            monkeypatch.setattr(handler, "callback", record)
+    async def parse(update, users, chats): return update.message, MessageHandler
+    monkeypatch.setitem(dispatcher.update_parsers, RawUpdate, parse)
+    async def scenario():
+        monkeypatch.setattr(dispatcher, "updates_queue", asyncio.Queue())
+        for packet in [(RawUpdate(message), {}, {}), None]: dispatcher.updates_queue.put_nowait(packet)
+        await dispatcher.handler_worker(asyncio.Lock())
+    dispatcher.loop.run_until_complete(scenario())  # sync filters run in an executor bound to this loop
+    return ran
+
+
+def test_broadcast_reply_reaches_broadcast_command(monkeypatch):
+    import bot
+    assert dispatch(bot, monkeypatch, admin_message("/broadcast", reply_to=FakeMessage(ADMIN_ID, text="Eid Mubarak!"))) == ["broadcast_command"]
+
+def test_force_reply_answers_still_reach_admin_reply_handler(monkeypatch):
+    import bot
+    prompt = FakeMessage(ADMIN_ID, text="✍️ reply")
+    prompt.reply_markup = ForceReply(selective=True, placeholder="reply_to_42")
+    assert dispatch(bot, monkeypatch, admin_message("hello there", reply_to=prompt)) == ["admin_reply_handler"]
+
+def test_plain_admin_reply_falls_through_to_search(monkeypatch):
+    import bot
+    assert dispatch(bot, monkeypatch, admin_message("pathaan", reply_to=FakeMessage(ADMIN_ID, text="old"))) == ["reliable_search_handler"]
+
+def test_prompted_broadcast_is_stored_in_the_log_channel_and_delivered(offline_bot, monkeypatch):
+    bot, database, client, run = offline_bot
+    copies = []
+    async def copy_message(chat_id, from_chat_id, message_id, **_): copies.append((chat_id, from_chat_id, message_id))
+    monkeypatch.setattr(client, "copy_message", copy_message)
+    prompt = FakeMessage(ADMIN_ID, text="📣 prompt", client=client)
+    prompt.reply_markup = ForceReply(selective=True, placeholder="broadcast")
+    announcement = admin_message("Eid Mubarak!", reply_to=prompt)
+    announcement.client = client
+    async def scenario():
+        await database["users"].insert_many([{"_id": user_id} for user_id in (11, 12, 13)])
+        await bot.admin_reply_handler(client, announcement)
+        await bot.broadcast_task
+        return await database["bot_state"].find_one({"_id": "broadcast"})
+    state = run(scenario())
+    assert state['from_chat_id'] == bot.LOG_CHANNEL_ID and state['message_id'] != announcement.id
+    assert state['delivered'] == 3 and state['done'] is True
+    assert copies == [(user_id, bot.LOG_CHANNEL_ID, state['message_id']) for user_id in (11, 12, 13)]
+
+def test_resumed_broadcast_reports_the_rate_of_this_run_only():
+    import bot
+    state = {"delivered": 9000, "blocked": 900, "failed": 100}
+    assert "`100.0` msg/s" in bot.broadcast_report(state, 10, "📣", processed_before=9000)
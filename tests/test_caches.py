@@ -0,0 +1,39 @@
+"""TTLCache behaviour and the read-through movie/file caches on the offline fakes."""
+
+import bot
+
+
+def test_cache_expires_entries_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(bot.time, "monotonic", lambda: now[0])
+    cache = bot.TTLCache("test", 10, 60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    now[0] += 61
+    assert cache.get("a") is None and "a" not in cache.data
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_evicts_least_recently_used():
+    cache = bot.TTLCache("test", 2, 60)
+    cache.set("a", 1); cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert list(cache.data) == ["a", "c"]
+
+def test_read_through_caches_and_invalidation(offline_bot):
+    bot, database, _, run = offline_bot
+    async def scenario():
+        movie = {"title": "Pathaan", "year": "2023", "title_lower": "pathaan"}
+        await database["movie_info"].insert_one(movie)
+        await database["files"].insert_many([{"movie_id": movie['_id'], "quality": quality, "language": "Hindi"} for quality in ("720p", "480p")])
+        first_files, first_movies = await bot.get_movie_files(movie['_id']), await bot.get_movies([movie['_id'], "missing"])
+        await database["movie_info"].update_one({"_id": movie['_id']}, {"$set": {"title": "Renamed"}})
+        cached = (await bot.get_movie(movie['_id']))['title']
+        file_doc, file_movie = await bot.get_file_with_movie(first_files[0]['_id'])
+        bot.invalidate_movie(movie['_id'])
+        return first_files, first_movies, cached, file_doc, file_movie, (await bot.get_movie(movie['_id']))['title']
+    files, movies, cached, file_doc, file_movie, refreshed = run(scenario())
+    assert [doc['quality'] for doc in files] == ["480p", "720p"] and [doc['title'] for doc in movies] == ["Pathaan"]
+    assert cached == "Pathaan" and file_doc['_id'] == files[0]['_id'] and file_movie['title'] == "Pathaan"
+    assert refreshed == "Renamed"
+    assert bot.movie_cache.hits >= 2 and bot.file_cache.hits == 1
@@ -0,0 +1,27 @@
+"""caption_parser.py against the labeled corpus in benchmarks/caption_corpus.jsonl, plus how bot.py uses it."""
+
+import logging
+
+import pytest
+
+import bot
+from bench_parser import CORPUS, FIELDS, load_corpus
+from caption_parser import parse_caption
+from fakes import FakeMessage, fake_file
+
+RECORDS = load_corpus(CORPUS)
+
+
+@pytest.mark.parametrize("record", RECORDS, ids=[record['caption'] or record['file_name'] for record in RECORDS])
+def test_corpus_record_parses_to_expected_fields(record):
+    parsed = parse_caption(record['caption'], record.get('file_name'))
+    assert {field: parsed[field] for field in FIELDS} == record['expected']
+
+
+def test_untitled_posts_fall_back_to_file_name_or_are_logged(caplog):
+    named = FakeMessage(-100, caption="⭐⭐⭐", video=fake_file("a", "Pathaan.2023.720p.mkv"))
+    untitled = FakeMessage(-100, caption="🔥 720p", document=fake_file("b", "720p.mkv"))
+    with caplog.at_level(logging.WARNING, logger=bot.LOGGER.name):
+        entries = bot.parse_file_messages([named, untitled, FakeMessage(-100, text="not a file")])
+    assert [(entry['title'], entry['year'], entry['msg_id']) for entry in entries] == [("Pathaan", "2023", named.id)]
+    assert [record.getMessage() for record in caplog.records] == [f"Skipped post {untitled.id} in -100: no title in caption or file name."]
@@ -0,0 +1,50 @@
+"""IndexWriter retries and resumable /index backfill checkpoints on the offline fakes."""
+
+import asyncio
+
+from pyrogram.enums import ChatType
+
+from fakes import FakeMessage, fake_file
+
+
+def channel_post(bot, client, caption):
+    message = FakeMessage(bot.FILE_CHANNEL_ID, ChatType.CHANNEL, caption=caption, video=fake_file(f"file-{caption}"), client=client)
+    client.channel_messages[message.id] = message
+    return message
+
+def fail_first_writes(writer, failures):
+    original, calls = writer._write, []
+    async def flaky(batch):
+        calls.append(len(batch))
+        if len(calls) <= failures: raise RuntimeError("mongo down")
+        return await original(batch)
+    writer._write = flaky
+    return calls
+
+
+def test_live_batch_is_retried_after_a_failed_write(offline_bot):
+    bot, database, client, run = offline_bot
+    bot.index_writer = bot.IndexWriter(max_delay=0.01, retry_delay=0.02)
+    calls = fail_first_writes(bot.index_writer, 1)
+    async def scenario():
+        await bot.flexible_save_movie_quality(client, channel_post(bot, client, "Pathaan (2023) 720p Hindi"))
+        await asyncio.sleep(0.15)
+        return await database["movie_info"].count_documents({}), await database["files"].count_documents({})
+    assert run(scenario()) == (1, 1)
+    assert calls == [1, 1] and bot.index_writer.pending == [] and bot.index_writer.written == 1
+
+def test_failed_backfill_keeps_its_checkpoint_and_resumes(offline_bot):
+    bot, database, client, run = offline_bot
+    bot.index_writer = bot.IndexWriter(retry_delay=60)
+    posts = [channel_post(bot, client, f"Movie {i} (2020) 720p Hindi") for i in range(10)]
+    fail_first_writes(bot.index_writer, 1)
+    async def scenario():
+        await bot.backfill_runner(client, FakeMessage(1, client=client), {"next_id": posts[0].id})
+        failed = await database["bot_state"].find_one({"_id": "backfill"}, {"_id": 0})
+        await bot.backfill_runner(client, FakeMessage(1, client=client), dict(failed))
+        bot.index_writer.timer.cancel()
+        return failed, await database["bot_state"].find_one({"_id": "backfill"}, {"_id": 0}), await database["movie_info"].count_documents({})
+    failed, finished, movies = run(scenario())
+    assert failed == {"next_id": posts[0].id, "done": False}
+    assert finished['done'] is True and finished['next_id'] > posts[-1].id
+    assert movies == 10
@@ -0,0 +1,45 @@
+"""The asyncio HTTP endpoint: health, Prometheus metrics, the profiler and bad requests."""
+
+import asyncio
+
+import bot
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.data, self.closed = b"", False
+
+    def write(self, data): self.data += data
+    async def drain(self): pass
+    def close(self): self.closed = True
+
+def get(path):
+    async def scenario():
+        reader = asyncio.StreamReader()
+        reader.feed_data(f"GET {path} HTTP/1.1\r\nHost: bot\r\n\r\n".encode()); reader.feed_eof()
+        writer = RecordingWriter()
+        await bot.handle_http(reader, writer)
+        return writer
+    writer = asyncio.run(scenario())
+    head, _, body = writer.data.decode().partition("\r\n\r\n")
+    assert writer.closed
+    return head.split("\r\n")[0], body
+
+
+def test_health_and_metrics():
+    bot.metrics.observe("bot_handler_seconds", 0.002, handler="search")
+    assert get("/") == ("HTTP/1.1 200 OK", "Bot is alive and running!")
+    status, body = get("/metrics")
+    assert status == "HTTP/1.1 200 OK" and 'bot_handler_seconds_bucket{handler="search",le="0.005"}' in body
+    assert get("/nope")[0] == "HTTP/1.1 404 Not Found"
+
+def test_profiler_rejects_unparseable_seconds(monkeypatch):
+    monkeypatch.setattr(bot, "PROFILER_ENABLED", True)
+    for value in ("abc", "nan", "inf"):
+        assert get(f"/debug/profile?seconds={value}")[0] == "HTTP/1.1 400 Bad Request"
+    status, body = get("/debug/profile?seconds=0.1")
+    assert status == "HTTP/1.1 200 OK"
+
+def test_profiler_is_hidden_unless_enabled(monkeypatch):
+    monkeypatch.setattr(bot, "PROFILER_ENABLED", False)
+    assert get("/debug/profile?seconds=1")[0] == "HTTP/1.1 404 Not Found"
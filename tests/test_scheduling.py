@@ -0,0 +1,196 @@
+"""DeleteScheduler, TokenBucket and SendQueue driven on the in-process fakes from benchmarks/fakes.py."""
+
+import time
+import asyncio
+
+import pytest
+from pyrogram.errors import FloodWait, MessageNotModified
+
+import bot
+from fakes import FakeDatabase, FakeClient, FakeMessage
+
+
+class RecordingClient(FakeClient):
+    def __init__(self):
+        super().__init__()
+        self.delete_calls = []
+
+    async def delete_messages(self, chat_id, message_ids):
+        self.delete_calls.append((chat_id, list(message_ids)))
+        return await super().delete_messages(chat_id, message_ids)
+
+
+@pytest.fixture
+def env(monkeypatch):
+    database, client = FakeDatabase(), RecordingClient()
+    monkeypatch.setattr(bot, "app", client)
+    monkeypatch.setattr(bot, "pending_deletes_db", database["pending_deletes"])
+    return database, client
+
+async def with_send_queue(coroutine):
+    """Deletes go through bot.send_queue; run them on an unpaced queue bound to this test's loop."""
+    original, bot.send_queue = bot.send_queue, bot.SendQueue(1e9, 1e9, 1e9, 16)
+    bot.send_queue.start()
+    try: return await coroutine
+    finally: await bot.send_queue.stop(); bot.send_queue = original
+
+
+# ========= 🗑️ DeleteScheduler ========= #
+def test_scheduled_deletes_are_persisted_before_they_fire(env):
+    database, client = env
+    async def scenario():
+        scheduler = bot.DeleteScheduler(flush_interval=0.01)
+        await scheduler.start()
+        scheduler.schedule([FakeMessage(-100), FakeMessage(-100)], 3600)
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+    asyncio.run(with_send_queue(scenario()))
+    docs = asyncio.run(database["pending_deletes"].find({}).to_list(None))
+    assert len(docs) == 1 and docs[0]['chat_id'] == -100 and len(docs[0]['message_ids']) == 2
+    assert client.delete_calls == []
+
+def test_resumes_pending_deletes_after_restart(env):
+    database, client = env
+    async def scenario():
+        await database["pending_deletes"].insert_many([
+            {"chat_id": -100, "message_ids": [1, 2], "due_at": time.time() - 5},
+            {"chat_id": -200, "message_ids": [3], "due_at": time.time() - 1},
+            {"chat_id": -300, "message_ids": [4], "due_at": time.time() + 3600}])
+        scheduler = bot.DeleteScheduler(flush_interval=0.01)
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return await database["pending_deletes"].find({}).to_list(None)
+    remaining = asyncio.run(with_send_queue(scenario()))
+    assert sorted(client.delete_calls) == [(-200, [3]), (-100, [1, 2])]
+    assert [doc['chat_id'] for doc in remaining] == [-300]
+
+def test_due_deletes_are_grouped_per_chat(env):
+    _, client = env
+    async def scenario():
+        scheduler = bot.DeleteScheduler(flush_interval=0.01)
+        await scheduler.start()
+        first, second = [FakeMessage(-100) for _ in range(3)], [FakeMessage(-200) for _ in range(2)]
+        scheduler.schedule(first[:2] + second[:1], 0)
+        scheduler.schedule(first[2:] + second[1:] + [None], 0)
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return first, second
+    first, second = asyncio.run(with_send_queue(scenario()))
+    calls = dict(client.delete_calls)
+    assert len(client.delete_calls) == 2
+    assert sorted(calls[-100]) == sorted(msg.id for msg in first) and sorted(calls[-200]) == sorted(msg.id for msg in second)
+
+
+def test_slow_deletes_do_not_hold_back_persisting_new_ones(env, monkeypatch):
+    database, client = env
+    async def scenario():
+        release = asyncio.Event()
+        async def stuck_delete(chat_id, message_ids):
+            await release.wait()  # e.g. a long FloodWait or a per-chat backlog
+            client.delete_calls.append((chat_id, list(message_ids)))
+        monkeypatch.setattr(client, "delete_messages", stuck_delete)
+        scheduler = bot.DeleteScheduler(flush_interval=0.01)
+        await scheduler.start()
+        scheduler.schedule([FakeMessage(-100)], 0)
+        await asyncio.sleep(0.05)
+        scheduler.schedule([FakeMessage(-200)], 3600)
+        await asyncio.sleep(0.05)
+        while_stuck = sorted(doc['chat_id'] for doc in await database["pending_deletes"].find({}).to_list(None))
+        release.set()
+        await asyncio.sleep(0.05)
+        after = [doc['chat_id'] for doc in await database["pending_deletes"].find({}).to_list(None)]
+        await scheduler.stop()
+        return while_stuck, after
+    while_stuck, after = asyncio.run(with_send_queue(scenario()))
+    assert while_stuck == [-200, -100]
+    assert after == [-200] and [chat_id for chat_id, _ in client.delete_calls] == [-100]
+
+
+# ========= 🪣 TokenBucket ========= #
+def test_token_bucket_allows_burst_then_reports_wait(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(bot.time, "monotonic", lambda: now[0])
+    bucket = bot.TokenBucket(rate=2, burst=3)
+    assert [bucket.consume("user") for _ in range(3)] == [0, 0, 0]
+    assert bucket.consume("user") == pytest.approx(0.5)
+    assert bucket.consume("other") == 0
+    now[0] += 0.5
+    assert bucket.consume("user") == 0
+    assert bucket.throttled == 1
+
+
+# ========= 📤 SendQueue ========= #
+def flood_wait(seconds):
+    error = FloodWait(value=1)
+    error.value = seconds  # pyrogram rounds to whole seconds; keep the test fast
+    return error
+
+def test_interactive_jobs_jump_ahead_of_bulk():
+    async def scenario():
+        queue, order = bot.SendQueue(1e9, 1e9, 1e9, 1), []
+        async def job(name): order.append(name)
+        futures = [queue.send(i, job, f"bulk{i}", priority=bot.SendQueue.BULK) for i in range(3)]
+        futures.append(queue.send(9, job, "interactive"))
+        queue.start()
+        await asyncio.gather(*futures)
+        await queue.stop()
+        return order
+    assert asyncio.run(scenario()) == ["interactive", "bulk0", "bulk1", "bulk2"]
+
+def test_jobs_for_one_chat_are_spaced_without_delaying_other_chats():
+    async def scenario():
+        queue, sent = bot.SendQueue(1e9, 20, 1, 16), []
+        async def job(chat_id): sent.append((chat_id, time.monotonic()))
+        queue.start()
+        await asyncio.gather(*[queue.send(-100, job, -100) for _ in range(3)], queue.send(-200, job, -200))
+        await queue.stop()
+        return sent
+    sent = asyncio.run(scenario())
+    busy = [at for chat_id, at in sent if chat_id == -100]
+    assert all(later - earlier >= 0.04 for earlier, later in zip(busy, busy[1:]))
+    assert next(at for chat_id, at in sent if chat_id == -200) < busy[1]
+
+def test_flood_wait_pauses_the_queue_and_retries():
+    async def scenario():
+        queue, calls = bot.SendQueue(1e9, 1e9, 1e9, 4), []
+        async def flaky():
+            calls.append(("flaky", time.monotonic()))
+            if len(calls) == 1: raise flood_wait(0.2)
+            return "sent"
+        async def other(): calls.append(("other", time.monotonic()))
+        queue.start()
+        started, first = time.monotonic(), queue.send(-100, flaky)
+        await asyncio.sleep(0.02)  # the FloodWait has paused the queue by now
+        result, _ = await asyncio.gather(first, queue.send(-200, other))
+        await queue.stop()
+        return queue, calls, started, result
+    queue, calls, started, result = asyncio.run(scenario())
+    assert result == "sent" and queue.flood_waits == 1 and queue.failed == 0
+    assert sorted(name for name, _ in calls) == ["flaky", "flaky", "other"]
+    assert all(at - started >= 0.19 for _, at in calls[1:]), "nothing may be sent while the queue is paused"
+
+def test_flood_wait_gives_up_after_max_retries():
+    async def scenario():
+        queue, attempts = bot.SendQueue(1e9, 1e9, 1e9, 4, max_retries=2), []
+        async def always_flooded():
+            attempts.append(1)
+            raise flood_wait(0)
+        queue.start()
+        with pytest.raises(FloodWait): await queue.send(-100, always_flooded)
+        await queue.stop()
+        return queue, attempts
+    queue, attempts = asyncio.run(scenario())
+    assert len(attempts) == 3 and queue.flood_waits == 3 and queue.failed == 1
+
+def test_unchanged_edits_reach_the_caller_without_counting_as_failures():
+    async def scenario():
+        queue = bot.SendQueue(1e9, 1e9, 1e9, 4)
+        async def unchanged_edit(): raise MessageNotModified()
+        async def broken(): raise ValueError("boom")
+        queue.start()
+        with pytest.raises(MessageNotModified): await queue.send(-100, unchanged_edit)
+        with pytest.raises(ValueError): await queue.send(-100, broken)
+        await queue.stop()
+        return queue
+    assert asyncio.run(scenario()).failed == 1
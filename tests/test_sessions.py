@@ -0,0 +1,50 @@
+"""Search sessions: short callback tokens, page flips without re-querying, and expiry."""
+
+from fakes import FakeMessage, FakeCallbackQuery
+
+
+class RecordingCallbackQuery(FakeCallbackQuery):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.answers = []
+
+    async def answer(self, text=None, show_alert=False, **_):
+        self.answers.append((text, show_alert))
+        return True
+
+def button_data(markup):
+    return [button.callback_data for row in markup.inline_keyboard for button in row]
+
+
+def test_session_token_keeps_callback_data_short(offline_bot):
+    bot, _, _, _ = offline_bot
+    session = bot.create_search_session("a very long search query " * 10, list(range(50)))
+    assert bot.search_sessions.get(session['token']) is session
+    markup = bot.build_search_results_markup([], session, 1, add_request_button=True)
+    assert all(len(data.encode()) <= 64 for data in button_data(markup))
+    assert f"nav_{session['token']}_0" in button_data(markup) and f"nav_{session['token']}_2" in button_data(markup)
+
+def test_nav_pages_through_session_ids_without_searching_again(offline_bot, monkeypatch):
+    bot, database, client, run = offline_bot
+    async def no_search(*_): raise AssertionError("nav must not re-run the search")
+    monkeypatch.setattr(bot, "search_movies", no_search)
+    async def scenario():
+        movies = [{"title": f"Movie {i:02d}", "year": "2020"} for i in range(bot.SEARCH_PAGE_SIZE + 3)]
+        await database["movie_info"].insert_many(movies)
+        session = bot.create_search_session("movie", [movie['_id'] for movie in movies])
+        message = FakeMessage(1, client=client)
+        await bot.callback_handler(client, RecordingCallbackQuery(f"nav_{session['token']}_1", message, 7))
+        return message
+    message = run(scenario())
+    titles = [row[0].text for row in message.reply_markup.inline_keyboard[:3]]
+    assert titles == ["🎬 Movie 08 (2020)", "🎬 Movie 09 (2020)", "🎬 Movie 10 (2020)"]
+
+def test_expired_session_answers_with_an_alert(offline_bot):
+    bot, _, client, run = offline_bot
+    session = bot.create_search_session("movie", [1, 2, 3])
+    bot.search_sessions.data[session['token']] = (bot.time.monotonic() - 1, session)  # TTL already passed
+    queries = [RecordingCallbackQuery(f"{action}_{session['token']}{suffix}", FakeMessage(1, client=client), 7) for action, suffix in (("nav", "_1"), ("reqmovie", ""))]
+    async def scenario():
+        for query in queries: await bot.callback_handler(client, query)
+    run(scenario())
+    assert all(len(query.answers) == 1 and query.answers[0][1] is True for query in queries)
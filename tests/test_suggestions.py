@@ -0,0 +1,34 @@
+"""SuggestionIndex: trigram candidates, incremental add/remove and the bounded posting scan."""
+
+import bot
+
+
+def make_index(titles, **kwargs):
+    index = bot.SuggestionIndex(**kwargs)
+    for movie_id, title in enumerate(titles): index.add({"_id": movie_id, "title": title, "year": "2020"})
+    return index
+
+def test_misspelled_query_finds_the_title():
+    index = make_index(["Interstellar", "Inception", "Pathaan", "Jawan"])
+    assert [movie['title'] for movie in index.search("intersteller", limit=1)] == ["Interstellar"]
+    assert index.search("zzzzzz") == []
+
+def test_remove_and_readd_update_the_postings():
+    index = make_index(["Pathaan", "Jawan"])
+    index.remove(0)
+    assert index.search("pathan") == [] and 0 not in index.entries
+    assert all(0 not in ids for ids in index.grams.values())
+    index.add({"_id": 1, "title": "Dunki", "year": "2023"})
+    assert index.search("jawan") == [] and index.search("dunky", limit=1)[0]['_id'] == 1
+
+def test_common_trigrams_do_not_scan_the_whole_catalogue(monkeypatch):
+    class CountingCounter(bot.Counter):
+        visited = 0
+        def update(self, iterable=None, **kwargs):
+            items = list(iterable or ())
+            CountingCounter.visited += len(items)
+            super().update(items, **kwargs)
+    monkeypatch.setattr(bot, "Counter", CountingCounter)
+    index = make_index([f"The Movie {i:05d}" for i in range(5000)] + ["The Zorro Legacy"], posting_budget=50)
+    assert index.search("the zoro legacy", threshold=0, limit=1)[0]['title'] == "The Zorro Legacy"
+    assert CountingCounter.visited <= 50